@@ -0,0 +1,130 @@
+"""
+Daily-grain aggregate cubes for thelook, shared by all sessions of a worker.
+
+Date-range changes in the EC sidebar are answered by slicing and rolling up
+these frames locally. Each cube is a `DailyRangeCache`, so only days that have
+not been loaded yet are queried:
+
+- item cube: day × product_category × product_brand × status with additive
+  measures (items, revenue, profit). `orders` is a distinct count per cell and
+  must not be summed across cells.
+- order facts: one row per day with order counts and fulfilment hour totals,
+  so daily orders and average lead times roll up exactly.
+
+"""
+
+from datetime import date
+
+import numpy as np
+import pandas as pd
+import streamlit as st
+
+from lib.query_backend import run_query
+from lib.range_cache import DailyRangeCache
+
+from .utils import iso_format
+
+CUBE_TTL = 6 * 3600
+
+
+def _fetch_item_cube(start: date, end: date, ttl: int = CUBE_TTL) -> pd.DataFrame:
+    q = f"""
+        SELECT
+            DATE(oi.created_at)            AS day,
+            ii.product_category,
+            ii.product_brand,
+            oi.status,
+            COUNT(*)                       AS items,
+            COUNT(DISTINCT oi.order_id)    AS orders,
+            SUM(oi.sale_price)             AS revenue,
+            SUM(oi.sale_price - ii.cost)   AS profit
+        FROM `bigquery-public-data.thelook_ecommerce.order_items` AS oi
+        JOIN `bigquery-public-data.thelook_ecommerce.inventory_items` AS ii
+          ON oi.inventory_item_id = ii.id
+        WHERE DATE(oi.created_at) BETWEEN '{iso_format(start)}' AND '{iso_format(end)}'
+        GROUP BY day, product_category, product_brand, status
+    """
+    return run_query(q, ttl=ttl)
+
+
+def _fetch_order_facts(start: date, end: date, ttl: int = CUBE_TTL) -> pd.DataFrame:
+    q = f"""
+        SELECT
+            DATE(created_at) AS day,
+            COUNT(*)         AS orders,
+            COUNTIF(shipped_at IS NOT NULL AND delivered_at IS NOT NULL)
+                             AS fulfilled_orders,
+            SUM(CASE WHEN shipped_at IS NOT NULL AND delivered_at IS NOT NULL
+                     THEN TIMESTAMP_DIFF(shipped_at, created_at, HOUR) END)
+                             AS proc_hours,
+            SUM(CASE WHEN shipped_at IS NOT NULL AND delivered_at IS NOT NULL
+                     THEN TIMESTAMP_DIFF(delivered_at, shipped_at, HOUR) END)
+                             AS ship_hours
+        FROM `bigquery-public-data.thelook_ecommerce.orders`
+        WHERE DATE(created_at) BETWEEN '{iso_format(start)}' AND '{iso_format(end)}'
+        GROUP BY day
+    """
+    result = run_query(q, ttl=ttl)
+    # Hour totals are NULL on days without fulfilled orders
+    return result.astype(
+        {
+            "orders": np.int64,
+            "fulfilled_orders": np.int64,
+            "proc_hours": np.float64,
+            "ship_hours": np.float64,
+        }
+    )
+
+
+@st.cache_resource  # shared read-only across sessions, filled in per day
+def item_cube() -> DailyRangeCache:
+    return DailyRangeCache(_fetch_item_cube)
+
+
+@st.cache_resource
+def order_facts() -> DailyRangeCache:
+    return DailyRangeCache(_fetch_order_facts)
+
+
+def daily_sales(start: date, end: date) -> pd.DataFrame:
+    """day, orders, revenue – all statuses."""
+    items = item_cube().get(start, end)
+    revenue = items.groupby("day", as_index=False)["revenue"].sum()
+    orders = order_facts().get(start, end)[["day", "orders"]]
+    return orders.merge(revenue, on="day", how="inner")
+
+
+def daily_sales_trend(start: date, end: date) -> pd.DataFrame:
+    """day, total_sales, total_profit – all statuses."""
+    items = item_cube().get(start, end)
+    return (
+        items.groupby("day", as_index=False)[["revenue", "profit"]]
+        .sum()
+        .rename(columns={"revenue": "total_sales", "profit": "total_profit"})
+    )
+
+
+def bottlenecks(start: date, end: date) -> pd.DataFrame:
+    """day, proc_days, ship_days – average processing / shipping hours."""
+    facts = order_facts().get(start, end)
+    facts = facts[facts["fulfilled_orders"] > 0]
+    return pd.DataFrame(
+        {
+            "day": facts["day"],
+            "proc_days": facts["proc_hours"] / facts["fulfilled_orders"],
+            "ship_days": facts["ship_hours"] / facts["fulfilled_orders"],
+        }
+    ).reset_index(drop=True)
+
+
+def category_brand_sales(
+    start: date, end: date, statuses=("Complete", "Shipped", "Returned")
+) -> pd.DataFrame:
+    """product_category, product_brand, total_sales for the given statuses."""
+    items = item_cube().get(start, end)
+    items = items[items["status"].isin(statuses)]
+    return (
+        items.groupby(["product_category", "product_brand"], as_index=False)["revenue"]
+        .sum()
+        .rename(columns={"revenue": "total_sales"})
+    )
@@ -1,35 +1,41 @@
 from datetime import date
-from typing import Tuple
+from typing import Optional
 
 import numpy as np
 import pandas as pd
 import streamlit as st
 
-from lib.bigquery_client import bigquery_client
+from lib import spatial
+from lib.query_backend import run_query
+from lib.range_cache import DailyRangeCache
 
-from .utils import iso_format
+from . import daily_cube
+from .utils import get_date_range, iso_format
 
 
-@st.cache_data(show_spinner="Querying daily revenue & orders …")
 def q_daily_sales(start: date, end: date) -> pd.DataFrame:
-    q = f"""
-        WITH daily AS (
-            SELECT DATE(o.created_at) AS day,
-                   COUNT(DISTINCT o.order_id)      AS orders,
-                   SUM(oi.sale_price)             AS revenue
-            FROM `bigquery-public-data.thelook_ecommerce.order_items`  oi
-            JOIN `bigquery-public-data.thelook_ecommerce.orders`      o
-              ON oi.order_id = o.order_id
-            WHERE o.created_at BETWEEN '{iso_format(start)}' AND '{iso_format(end)}'
-            GROUP BY day
-        )
-        SELECT * FROM daily ORDER BY day;
-    """
-    return bigquery_client.query(q).to_dataframe()
+    """Daily orders & revenue, rolled up from the cached daily cube."""
+    return daily_cube.daily_sales(start, end)
 
 
-@st.cache_data(show_spinner="Querying customer stats …")
-def q_customer_stats(start: date, end: date) -> Tuple[int, int]:
+def q_daily_sales_compare(start: date, end: date) -> pd.DataFrame:
+    """Daily revenue & orders for [start, end] and the previous period of equal
+    length; rows are tagged `period` = "current" / "previous"."""
+    _, _, prev_start, prev_end, _ = get_date_range(start, end)
+    df = daily_cube.daily_sales(prev_start, end)
+    df.insert(
+        0, "period", np.where(df["day"] > pd.Timestamp(prev_end), "current", "previous")
+    )
+    return df
+
+
+@st.cache_data(show_spinner=False)  # loaded via run_concurrently
+def q_customer_stats_compare(start: date, end: date) -> pd.DataFrame:
+    """New / total customers for [start, end] and the previous period in one
+    query, indexed by `period` ("current" / "previous")."""
+    _, _, prev_start, prev_end, _ = get_date_range(start, end)
+    cur = f"BETWEEN '{iso_format(start)}' AND '{iso_format(end)}'"
+    prev = f"BETWEEN '{iso_format(prev_start)}' AND '{iso_format(prev_end)}'"
     q = f"""
         WITH first_orders AS (
             SELECT user_id, MIN(created_at) AS first_order_date
@@ -37,19 +43,43 @@ def q_customer_stats(start: date, end: date) -> Tuple[int, int]:
             GROUP BY user_id
         ),
         new_customers_cte AS (
-            SELECT COUNT(*) AS cnt FROM first_orders
-            WHERE first_order_date BETWEEN '{iso_format(start)}' AND '{iso_format(end)}'
+            SELECT COUNTIF(DATE(first_order_date) {cur})  AS new_cur,
+                   COUNTIF(DATE(first_order_date) {prev}) AS new_prev
+            FROM first_orders
         ),
         tot AS (
-            SELECT COUNT(DISTINCT user_id) AS cnt
+            SELECT COUNT(DISTINCT IF(DATE(created_at) {cur}, user_id, NULL))  AS tot_cur,
+                   COUNT(DISTINCT IF(DATE(created_at) {prev}, user_id, NULL)) AS tot_prev
+            FROM `bigquery-public-data.thelook_ecommerce.orders`
+            WHERE DATE(created_at) BETWEEN '{iso_format(prev_start)}' AND '{iso_format(end)}'
+        )
+        SELECT * FROM new_customers_cte CROSS JOIN tot;
+    """
+    r = run_query(q).iloc[0]
+    return pd.DataFrame(
+        {
+            "new_customers": [int(r.new_cur), int(r.new_prev)],
+            "total_customers": [int(r.tot_cur), int(r.tot_prev)],
+        },
+        index=pd.Index(["current", "previous"], name="period"),
+    )
+
+
+@st.cache_data(show_spinner=False)  # loaded via run_concurrently
+def q_daily_new_customers(start: date, end: date) -> pd.DataFrame:
+    q = f"""
+        WITH first_orders AS (
+            SELECT user_id, MIN(created_at) AS first_order_date
             FROM `bigquery-public-data.thelook_ecommerce.orders`
-            WHERE created_at BETWEEN '{iso_format(start)}' AND '{iso_format(end)}'
+            GROUP BY user_id
         )
-        SELECT (SELECT cnt FROM new_customers_cte) AS new_customers,
-               (SELECT cnt FROM tot) AS total_customers;
+        SELECT DATE(first_order_date) AS order_date, COUNT(*) AS new_customers
+        FROM first_orders
+        WHERE DATE(first_order_date) BETWEEN '{iso_format(start)}' AND '{iso_format(end)}'
+        GROUP BY order_date
+        ORDER BY order_date;
     """
-    r = bigquery_client.query(q).to_dataframe().iloc[0]
-    return int(r.new_customers), int(r.total_customers)
+    return run_query(q)
 
 
 @st.cache_data(show_spinner="Fetching distribution centers …")
@@ -58,39 +88,110 @@ def q_distribution_centers() -> pd.DataFrame:
         SELECT id, name, latitude  AS dc_lat, longitude AS dc_lon
         FROM `bigquery-public-data.thelook_ecommerce.distribution_centers`;
     """
-    return bigquery_client.query(q).to_dataframe()
+    return run_query(q)
+
+
+# Finest lat/lon grid (degrees, ~11 km) the order locations are binned to in
+# SQL; coarser map resolutions are rolled up locally
+GEO_CELL_DEG = 0.1
+MAX_LEAD_TIME_DAYS = 30  # lead times are bucketed into 0..30 days
 
 
 @st.cache_data(show_spinner="Querying order geo data …")
 def q_order_geo(start: date, end: date) -> pd.DataFrame:
-    """Return orders with customer lat/lon & shipping lead‑time."""
+    """Shipped orders in [start, end] per GEO_CELL_DEG grid cell × lead-time bucket.
+
+    Columns: lat_cell, lon_cell, lead_bucket, orders, lead_time_sum, lat_sum,
+    lon_sum (sums of the customers' coordinates, for centroids). The range is
+    aggregated as a whole, so a row covers every order of the window in that
+    cell and bucket rather than one day's worth.
+    """
     q = f"""
+        WITH shipped AS (
+            SELECT
+                TIMESTAMP_DIFF(o.delivered_at, o.shipped_at, DAY) AS lead_time_days,
+                u.latitude                                        AS cust_lat,
+                u.longitude                                       AS cust_lon
+            FROM `bigquery-public-data.thelook_ecommerce.orders` o
+            JOIN `bigquery-public-data.thelook_ecommerce.users`  u
+              ON o.user_id = u.id
+            WHERE DATE(o.created_at) BETWEEN '{iso_format(start)}' AND '{iso_format(end)}'
+              AND o.shipped_at IS NOT NULL AND o.delivered_at IS NOT NULL
+              AND u.latitude IS NOT NULL AND u.longitude IS NOT NULL
+        )
         SELECT
-            o.order_id,
-            TIMESTAMP(o.created_at)                      AS order_date,
-            TIMESTAMP_DIFF(o.delivered_at, o.shipped_at, DAY) AS lead_time_days,
-            u.latitude  AS cust_lat,
-            u.longitude AS cust_lon
-        FROM `bigquery-public-data.thelook_ecommerce.orders` o
-        JOIN `bigquery-public-data.thelook_ecommerce.users`  u
-          ON o.user_id = u.id
-        WHERE o.created_at BETWEEN '{iso_format(start)}' AND '{iso_format(end)}'
-          AND o.shipped_at IS NOT NULL AND o.delivered_at IS NOT NULL
-          AND u.latitude IS NOT NULL AND u.longitude IS NOT NULL;
+            CAST(FLOOR(cust_lat / {GEO_CELL_DEG}) AS INT64)                AS lat_cell,
+            CAST(FLOOR(cust_lon / {GEO_CELL_DEG}) AS INT64)                AS lon_cell,
+            LEAST(GREATEST(lead_time_days, 0), {MAX_LEAD_TIME_DAYS})      AS lead_bucket,
+            COUNT(*)            AS orders,
+            SUM(lead_time_days) AS lead_time_sum,
+            SUM(cust_lat)       AS lat_sum,
+            SUM(cust_lon)       AS lon_sum
+        FROM shipped
+        GROUP BY lat_cell, lon_cell, lead_bucket;
+    """
+    result = run_query(q)
+    return result.astype(
+        {
+            "lat_cell": np.int32,
+            "lon_cell": np.int32,
+            "lead_bucket": np.int8,
+            "orders": np.int32,
+            "lead_time_sum": np.int64,
+            "lat_sum": np.float64,
+            "lon_sum": np.float64,
+        }
+    )
+
+
+def q_order_geo_bins(start: date, end: date, cell_deg: float) -> pd.DataFrame:
+    """lat, lon (order centroid), orders per `cell_deg` grid cell.
+
+    `cell_deg` must be a multiple of GEO_CELL_DEG.
     """
-    result = bigquery_client.query(q).to_dataframe()
-    result["lead_time_days"] = (
-        pd.to_numeric(result["lead_time_days"], errors="coerce")
-        .fillna(0)
-        .astype(np.int64)
+    geo = q_order_geo(start, end)
+    factor = round(cell_deg / GEO_CELL_DEG)
+    bins = (
+        geo.groupby([geo["lat_cell"] // factor, geo["lon_cell"] // factor])[
+            ["orders", "lat_sum", "lon_sum"]
+        ]
+        .sum()
+        .reset_index(drop=True)
     )
-    result["cust_lat"] = (
-        pd.to_numeric(result["cust_lat"], errors="coerce").fillna(0).astype(np.float64)
+    return pd.DataFrame(
+        {
+            "lat": bins["lat_sum"] / bins["orders"],
+            "lon": bins["lon_sum"] / bins["orders"],
+            "orders": bins["orders"],
+        }
     )
-    result["cust_lon"] = (
-        pd.to_numeric(result["cust_lon"], errors="coerce").fillna(0).astype(np.float64)
+
+
+def q_order_dc_assignment(start: date, end: date) -> pd.DataFrame:
+    """q_order_geo rows with their nearest distribution center.
+
+    Adds dc_name and distance_km (great-circle, from the row's customer
+    centroid). Rows are small groups of orders within one GEO_CELL_DEG cell,
+    so the assignment is per ~11 km cell rather than per individual order.
+    """
+    geo = q_order_geo(start, end)
+    dc_df = q_distribution_centers()
+    nearest, distance = spatial.nearest_center(
+        geo["lat_sum"] / geo["orders"],
+        geo["lon_sum"] / geo["orders"],
+        dc_df["dc_lat"],
+        dc_df["dc_lon"],
     )
-    return result
+    return geo.assign(
+        dc_name=pd.Categorical(dc_df["name"].to_numpy()[nearest]),
+        distance_km=distance,
+    )
+
+
+def q_lead_times(start: date, end: date) -> pd.DataFrame:
+    """lead_bucket (days, clipped to 0..MAX_LEAD_TIME_DAYS), orders, lead_time_sum."""
+    geo = q_order_geo(start, end)
+    return geo.groupby("lead_bucket", as_index=False)[["orders", "lead_time_sum"]].sum()
 
 
 @st.cache_data(show_spinner="Querying product sales …")
@@ -110,36 +211,59 @@ def q_product_sales(start: date, end: date) -> pd.DataFrame:
         GROUP BY p.id, p.name
         ORDER BY revenue DESC;
     """
-    df = bigquery_client.query(q).to_dataframe()
+    df = run_query(q)
     return df
 
 
-@st.cache_data(show_spinner="Querying RFM …")
-def q_rfm(start: date, end: date) -> pd.DataFrame:
+def _fetch_user_day_rfm(
+    start: date, end: date, ttl: Optional[int] = None
+) -> pd.DataFrame:
+    # Per-user daily partials; any window is their associative merge:
+    # last purchase = max(day), frequency = sum(orders), monetary = sum(monetary)
     q = f"""
-        WITH order_data AS (
-            SELECT
-                user_id,
-                order_id,
-                created_at,
-                sale_price
-            FROM `bigquery-public-data.thelook_ecommerce.order_items`
-            WHERE DATE(created_at) BETWEEN '{iso_format(start)}' AND '{iso_format(end)}'
-              AND status IN ('Complete', 'Shipped', 'Returned')
-        ),
-        user_rfm AS (
-            SELECT
-                user_id,
-                DATE_DIFF(PARSE_DATE('%Y-%m-%d', '{iso_format(end)}'), MAX(DATE(created_at)), DAY) AS recency,
-                COUNT(DISTINCT order_id) AS frequency,
-                SUM(sale_price) AS monetary
-            FROM order_data
-            GROUP BY user_id
-        )
-        SELECT * FROM user_rfm;
+        SELECT
+            DATE(created_at)         AS day,
+            user_id,
+            COUNT(DISTINCT order_id) AS orders,
+            SUM(sale_price)          AS monetary
+        FROM `bigquery-public-data.thelook_ecommerce.order_items`
+        WHERE DATE(created_at) BETWEEN '{iso_format(start)}' AND '{iso_format(end)}'
+          AND status IN ('Complete', 'Shipped', 'Returned')
+        GROUP BY day, user_id
+        ORDER BY day;
     """
-    df = bigquery_client.query(q).to_dataframe()
-    return df
+    result = run_query(q, ttl=ttl)
+    return result.astype(
+        {"user_id": np.int64, "orders": np.int32, "monetary": np.float64}
+    )
+
+
+@st.cache_resource  # per-day partitions shared by all sessions
+def _user_day_rfm_cache() -> DailyRangeCache:
+    return DailyRangeCache(_fetch_user_day_rfm)
+
+
+def q_rfm(start: date, end: date) -> pd.DataFrame:
+    """user_id, recency (days before `end`), frequency (orders), monetary.
+
+    Assembled from cached per-user daily partials, so sliding the window only
+    queries the new days.
+    """
+    partials = _user_day_rfm_cache().get(start, end)
+    per_user = partials.groupby("user_id", sort=True).agg(
+        last_day=("day", "max"),
+        frequency=("orders", "sum"),
+        monetary=("monetary", "sum"),
+    )
+    recency = (pd.Timestamp(end) - per_user["last_day"]).dt.days
+    return pd.DataFrame(
+        {
+            "user_id": per_user.index,
+            "recency": recency.to_numpy(),
+            "frequency": per_user["frequency"].to_numpy(),
+            "monetary": per_user["monetary"].to_numpy(),
+        }
+    )
 
 
 @st.cache_data(show_spinner="Querying inventory & demand …")
@@ -156,51 +280,18 @@ def q_inventory_demand(start: date, end: date) -> pd.DataFrame:
          AND DATE(oi.created_at) BETWEEN '{iso_format(start)}' AND '{iso_format(end)}'
         GROUP BY ii.product_category;
     """
-    df = bigquery_client.query(q).to_dataframe()
+    df = run_query(q)
     return df
 
 
-@st.cache_data(show_spinner="Querying bottlenecks …")
 def q_bottlenecks(start: date, end: date) -> pd.DataFrame:
-    q = f"""
-        SELECT
-            DATE(o.created_at) AS day,
-            AVG(TIMESTAMP_DIFF(o.shipped_at, o.created_at, HOUR)) AS proc_days,
-            AVG(TIMESTAMP_DIFF(o.delivered_at, o.shipped_at, HOUR)) AS ship_days
-        FROM `bigquery-public-data.thelook_ecommerce.orders` o
-        WHERE o.shipped_at IS NOT NULL AND o.delivered_at IS NOT NULL
-          AND DATE(o.created_at) BETWEEN '{iso_format(start)}' AND '{iso_format(end)}'
-        GROUP BY day
-        ORDER BY day;
-    """
-    df = bigquery_client.query(q).to_dataframe()
-    return df
+    """Average processing / shipping hours per day, from the daily order facts."""
+    return daily_cube.bottlenecks(start, end)
 
 
-@st.cache_data(show_spinner="Querying daily sales trend …")
 def q_daily_sales_trend(start: date, end: date) -> pd.DataFrame:
-    q = f"""
-        SELECT
-            DATE(oi.created_at) AS day,
-            SUM(oi.sale_price) AS total_sales,
-            SUM(oi.sale_price - ii.cost) AS total_profit
-        FROM
-            `bigquery-public-data.thelook_ecommerce.order_items` AS oi
-        JOIN
-            `bigquery-public-data.thelook_ecommerce.inventory_items` AS ii
-        ON
-            oi.inventory_item_id = ii.id
-        WHERE
-            DATE(oi.created_at) BETWEEN '{iso_format(start)}' AND '{iso_format(end)}'
-        GROUP BY
-            day
-        ORDER BY
-            day
-    """
-    df = bigquery_client.query(q).to_dataframe()
-    if not df.empty:
-        df["day"] = pd.to_datetime(df["day"])
-    return df
+    """Daily sales & profit, rolled up from the cached daily cube."""
+    return daily_cube.daily_sales_trend(start, end)
 
 
 @st.cache_data(show_spinner="Querying customer demographics...")
@@ -221,26 +312,10 @@ def q_customer_demographics(start: date, end: date) -> pd.DataFrame:
     GROUP BY
         u.gender, u.age, o.status
     """
-    df = bigquery_client.query(query).to_dataframe()
+    df = run_query(query)
     return df
 
 
-@st.cache_data(show_spinner="Querying category and brand sales...")
 def q_category_brand_sales(start: date, end: date) -> pd.DataFrame:
-    query = f"""
-    SELECT
-        ii.product_category,
-        ii.product_brand,
-        SUM(oi.sale_price) AS total_sales
-    FROM
-        `bigquery-public-data.thelook_ecommerce.order_items` AS oi
-    JOIN
-        `bigquery-public-data.thelook_ecommerce.inventory_items` AS ii ON oi.inventory_item_id = ii.id
-    WHERE
-        DATE(oi.created_at) BETWEEN '{iso_format(start)}' AND '{iso_format(end)}'
-        AND oi.status IN ('Complete', 'Shipped', 'Returned')
-    GROUP BY
-        ii.product_category, ii.product_brand
-    """
-    df = bigquery_client.query(query).to_dataframe()
-    return df
+    """Sales by category & brand (completed/shipped/returned items), from the cube."""
+    return daily_cube.category_brand_sales(start, end)
@@ -1,43 +1,43 @@
 import os
-from datetime import date, timedelta
+from functools import partial
 
 import streamlit as st
 
-from lib.bigquery_client import bigquery_client
+from lib.concurrent_queries import run_concurrently
+from lib.downsample import HALF_WIDTH_PX, chart_points, full_resolution_toggle
 
-from .data_queries import q_customer_stats, q_daily_sales
-from .utils import iso_format
+from .data_queries import (
+    q_customer_stats_compare,
+    q_daily_new_customers,
+    q_daily_sales_compare,
+)
+from .utils import get_date_inputs, get_date_range
 
 
 def executive_overview():
     st.title("📊 Executive Overview")
     st.caption("thelook‑ecommerce public dataset → BigQuery → Streamlit 1.45.1")
 
-    # Date Range Selection & Derived Periods
-    TODAY = date.today()
-    def_start = TODAY - timedelta(days=30)
-    def_end = TODAY - timedelta(days=1)
-
-    with st.sidebar:
-        st.header("📅 Date Range")
-        start_date: date = st.date_input("Start", def_start, max_value=TODAY)
-        end_date: date = st.date_input("End", def_end, max_value=TODAY)
-
-        if end_date < start_date:
-            st.error("⚠️ End date must be on/after start date.")
-            st.stop()
-
-    # Previous period (same length immediately before)
-    period_days = (end_date - start_date).days + 1
-    prev_end = start_date - timedelta(days=1)
-    prev_start = prev_end - timedelta(days=period_days - 1)
-
-    # Data Fetch
-    current_df = q_daily_sales(start_date, end_date)
-    prev_df = q_daily_sales(prev_start, prev_end)
-
-    new_cust_cur, tot_cust_cur = q_customer_stats(start_date, end_date)
-    new_cust_prev, tot_cust_prev = q_customer_stats(prev_start, prev_end)
+    # Date Range Selection & Derived Periods (previous = same length right before)
+    start_date, end_date = get_date_inputs()
+    start_date, end_date, _, _, period_days = get_date_range(start_date, end_date)
+
+    # Data Fetch – both periods come back from one scan per metric, and the
+    # independent queries are submitted together
+    results = run_concurrently(
+        {
+            "sales": partial(q_daily_sales_compare, start_date, end_date),
+            "customers": partial(q_customer_stats_compare, start_date, end_date),
+            "new_daily": partial(q_daily_new_customers, start_date, end_date),
+        },
+        spinner="Querying sales and customer stats …",
+    )
+    sales_df = results["sales"]
+    current_df = sales_df[sales_df["period"] == "current"]
+    prev_df = sales_df[sales_df["period"] == "previous"]
+    new_cust_cur, tot_cust_cur = results["customers"].loc["current"]
+    new_cust_prev, tot_cust_prev = results["customers"].loc["previous"]
+    new_daily_df = results["new_daily"]
 
     # KPI Calculations
     revenue_cur = current_df["revenue"].sum()
@@ -82,34 +82,25 @@ def executive_overview():
 
     # Trend Charts
     st.subheader("Daily Revenue & Orders")
+    full_resolution = full_resolution_toggle(key="overview_full_resolution")
     trend_cols = st.columns(2)
 
     with trend_cols[0]:
         st.caption("💰 Revenue by Day")
-        chart_df = current_df.set_index("day")[["revenue"]]
-        st.line_chart(chart_df)
+        chart_df = chart_points(
+            current_df, "day", ["revenue"], HALF_WIDTH_PX, full_resolution
+        )
+        st.line_chart(chart_df.set_index("day")[["revenue"]])
 
     with trend_cols[1]:
         st.caption("📦 Orders by Day")
-        chart_df = current_df.set_index("day")[["orders"]]
-        st.line_chart(chart_df)
+        chart_df = chart_points(
+            current_df, "day", ["orders"], HALF_WIDTH_PX, full_resolution
+        )
+        st.line_chart(chart_df.set_index("day")[["orders"]])
 
     # New customers bar chart
     st.subheader("New Customers per Day")
-
-    daily_new_query = f"""
-        WITH first_orders AS (
-            SELECT user_id, MIN(created_at) AS first_order_date
-            FROM `bigquery-public-data.thelook_ecommerce.orders`
-            GROUP BY user_id
-        )
-        SELECT DATE(first_order_date) AS order_date, COUNT(*) AS new_customers
-        FROM first_orders
-        WHERE first_order_date BETWEEN '{iso_format(start_date)}' AND '{iso_format(end_date)}'
-        GROUP BY order_date
-        ORDER BY order_date;
-    """
-    new_daily_df = bigquery_client.query(daily_new_query).to_dataframe()
     if not new_daily_df.empty:
         st.bar_chart(new_daily_df.set_index("order_date"))
     else:
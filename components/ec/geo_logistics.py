@@ -1,9 +1,22 @@
+import numpy as np
+import pandas as pd
+import plotly.express as px
 import pydeck as pdk
 import streamlit as st
 
-from .data_queries import q_distribution_centers, q_order_geo
+from .data_queries import (
+    q_distribution_centers,
+    q_lead_times,
+    q_order_dc_assignment,
+    q_order_geo_bins,
+)
 from .utils import get_date_inputs, get_date_range
 
+# Map resolutions (grid cell size in degrees), from city to region level
+CELL_SIZES = {"City (0.1°)": 0.1, "Metro (0.5°)": 0.5, "Region (2°)": 2.0}
+DISTANCE_BAND_KM = 250
+MAX_DISTANCE_BANDS = 8  # the last band collects everything farther away
+
 
 def geo_logistics():
     start, end = get_date_inputs()
@@ -13,16 +26,16 @@ def geo_logistics():
     st.caption("Customer distribution, DC overlay, shipping lead‑time analytics")
 
     dc_df = q_distribution_centers()
-    geo_df = q_order_geo(start, end)
+    lead_df = q_lead_times(start, end)
 
-    if geo_df.empty:
+    if lead_df.empty:
         st.info("No geo‑tagged orders in selected period.")
         return
 
     # KPI – logistics
-    avg_lead = geo_df.lead_time_days.mean()
-    late_pct = (geo_df.lead_time_days > 7).mean() * 100
-    served_states = geo_df.shape[0]
+    served_states = lead_df.orders.sum()
+    avg_lead = lead_df.lead_time_sum.sum() / served_states
+    late_pct = lead_df.orders[lead_df.lead_bucket > 7].sum() / served_states * 100
 
     k1, k2, k3 = st.columns(3)
     k1.metric("Avg Lead Time", f"{avg_lead:.1f} days")
@@ -31,9 +44,12 @@ def geo_logistics():
 
     # Map – heatmap of orders + DC dots
     st.subheader("Customer Heatmap & Distribution Centers")
+    cell_label = st.radio("Map resolution", list(CELL_SIZES), horizontal=True)
+    # Only cell centroids and order counts are sent to the map
+    geo_df = q_order_geo_bins(start, end, CELL_SIZES[cell_label])
     view = pdk.ViewState(
-        latitude=geo_df.cust_lat.mean(),
-        longitude=geo_df.cust_lon.mean(),
+        latitude=(geo_df.lat * geo_df.orders).sum() / served_states,
+        longitude=(geo_df.lon * geo_df.orders).sum() / served_states,
         zoom=3,
         pitch=0,
     )
@@ -41,7 +57,8 @@ def geo_logistics():
     orders_layer = pdk.Layer(
         "HeatmapLayer",
         data=geo_df,
-        get_position="[cust_lon, cust_lat]",
+        get_position="[lon, lat]",
+        get_weight="orders",
         radius_pixels=60,
         opacity=0.9,
     )
@@ -59,12 +76,102 @@ def geo_logistics():
         initial_view_state=view,
         map_provider="mapbox",
         map_style=pdk.map_styles.MAPBOX_LIGHT,
-        tooltip={"text": "Lon: {cust_lon}\nLat: {cust_lat}"},
+        tooltip={"text": "{name}\nLon: {dc_lon}\nLat: {dc_lat}"},
     )
 
     st.pydeck_chart(deck)
 
     # Lead‑time histogram
     st.subheader("Shipping Lead‑Time Distribution (days)")
-    hist_vals = geo_df.lead_time_days.clip(lower=0, upper=30)
-    st.bar_chart(hist_vals.value_counts().sort_index())
+    st.bar_chart(lead_df.set_index("lead_bucket")["orders"].rename("count"))
+
+    # Distribution center coverage – every order to its nearest DC
+    st.subheader("Distribution Center Coverage (nearest DC)")
+    assigned = q_order_dc_assignment(start, end)
+    band = np.minimum(assigned.distance_km // DISTANCE_BAND_KM, MAX_DISTANCE_BANDS)
+    assigned = assigned.assign(
+        distance_sum=assigned.distance_km * assigned.orders,
+        late_orders=assigned.orders.where(assigned.lead_bucket > 7, 0),
+        distance_band=pd.Categorical.from_codes(
+            band.astype(int),
+            [
+                f"{i * DISTANCE_BAND_KM:,}–{(i + 1) * DISTANCE_BAND_KM:,} km"
+                for i in range(MAX_DISTANCE_BANDS)
+            ]
+            + [f"{MAX_DISTANCE_BANDS * DISTANCE_BAND_KM:,}+ km"],
+        ),
+    )
+    sums = ["orders", "distance_sum", "lead_time_sum", "late_orders"]
+
+    per_dc = assigned.groupby("dc_name", observed=True)[sums].sum()
+    dc_summary = pd.DataFrame(
+        {
+            "Orders": per_dc.orders,
+            "Share (%)": per_dc.orders / per_dc.orders.sum() * 100,
+            "Avg Distance (km)": per_dc.distance_sum / per_dc.orders,
+            "Avg Lead Time (days)": per_dc.lead_time_sum / per_dc.orders,
+            "Late (>7 d) (%)": per_dc.late_orders / per_dc.orders * 100,
+        }
+    ).sort_values("Orders", ascending=False)
+    st.dataframe(
+        dc_summary.rename_axis("Distribution Center"),
+        use_container_width=True,
+        column_config={
+            col: st.column_config.NumberColumn(format="%.1f")
+            for col in dc_summary.columns[1:]
+        },
+    )
+
+    dist_cols = st.columns(2)
+    with dist_cols[0]:
+        by_band = (
+            assigned.groupby(["distance_band", "dc_name"], observed=True)["orders"]
+            .sum()
+            .reset_index()
+        )
+        fig_distance = px.bar(
+            by_band,
+            x="distance_band",
+            y="orders",
+            color="dc_name",
+            title="Orders by Distance to Nearest DC",
+            labels={
+                "distance_band": "Distance",
+                "orders": "Orders",
+                "dc_name": "DC",
+            },
+        )
+        st.plotly_chart(fig_distance, use_container_width=True)
+    with dist_cols[1]:
+        lead_by_band = assigned.groupby("distance_band", observed=True)[sums].sum()
+        lead_by_band = pd.DataFrame(
+            {
+                "distance_band": lead_by_band.index,
+                "avg_lead_time": lead_by_band.lead_time_sum / lead_by_band.orders,
+            }
+        )
+        fig_lead = px.line(
+            lead_by_band,
+            x="distance_band",
+            y="avg_lead_time",
+            markers=True,
+            title="Avg Lead Time vs Distance",
+            labels={"distance_band": "Distance", "avg_lead_time": "Lead Time (days)"},
+        )
+        st.plotly_chart(fig_lead, use_container_width=True)
+
+    # Lead-time distribution within each DC (share of its orders per day bucket)
+    lead_dist = (
+        assigned.groupby(["dc_name", "lead_bucket"], observed=True)["orders"]
+        .sum()
+        .unstack(fill_value=0)
+    )
+    lead_dist = lead_dist.div(lead_dist.sum(axis=1), axis=0) * 100
+    fig_lead_dist = px.imshow(
+        lead_dist.loc[dc_summary.index],
+        aspect="auto",
+        color_continuous_scale="Blues",
+        title="Lead-Time Distribution by DC (% of DC orders)",
+        labels={"x": "Lead Time (days)", "y": "DC", "color": "% of orders"},
+    )
+    st.plotly_chart(fig_lead_dist, use_container_width=True)
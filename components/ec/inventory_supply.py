@@ -1,5 +1,7 @@
 import streamlit as st
 
+from lib.downsample import chart_points, full_resolution_toggle
+
 from .data_queries import q_bottlenecks, q_inventory_demand
 from .utils import get_date_inputs, get_date_range
 
@@ -21,5 +23,13 @@ def inventory_supply_chain():
 
     st.subheader("Bottleneck Trends")
     bot = q_bottlenecks(start, end)
+    # Min/max keeps the processing and shipping spikes visible when decimated
+    bot = chart_points(
+        bot,
+        "day",
+        ["proc_days", "ship_days"],
+        full_resolution=full_resolution_toggle(key="bottleneck_full_resolution"),
+        method="minmax",
+    )
     bot = bot.set_index("day")
     st.line_chart(bot[["proc_days", "ship_days"]])
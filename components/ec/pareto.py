@@ -0,0 +1,92 @@
+"""
+Pareto chart of product revenue that stays cheap as the catalog grows.
+
+The top `top_n` products keep one bar each; the long tail is binned into
+`n_bins` equal-count rank buckets. Bars are placed on a product-rank axis
+with their width set to the number of products they cover and their height
+to the mean revenue per product, so bar areas still add up to revenue. The
+cumulative share line uses the exact cumulative sums at every bar edge. The
+figure holds at most `top_n + n_bins` bars regardless of the catalog size.
+"""
+
+import numpy as np
+import pandas as pd
+import plotly.graph_objects as go
+from plotly.subplots import make_subplots
+
+from lib.figure_cache import cached_figure
+from lib.tailwind_colors import COLORS
+
+
+def pareto_bins(
+    df: pd.DataFrame, value_col: str = "revenue", top_n: int = 50, n_bins: int = 100
+) -> pd.DataFrame:
+    """One row per bar: first_rank, last_rank (1-based), products, value, cum_pct."""
+    values = np.sort(df[value_col].to_numpy(dtype=np.float64))[::-1]
+    n = len(values)
+    head = min(top_n, n)
+    # Bar edges: one per top product, then equal-count buckets for the tail
+    tail_edges = np.linspace(head, n, min(n_bins, n - head) + 1).round().astype(int)
+    edges = np.unique(np.concatenate([np.arange(head + 1), tail_edges]))
+    cumsum = np.concatenate([[0.0], np.cumsum(values)])
+    bar_values = np.diff(cumsum[edges])
+    return pd.DataFrame(
+        {
+            "first_rank": edges[:-1] + 1,
+            "last_rank": edges[1:],
+            "products": np.diff(edges),
+            "value": bar_values,
+            "cum_pct": cumsum[edges[1:]] / cumsum[-1] * 100,
+        }
+    )
+
+
+def _pareto_figure(bins: pd.DataFrame, title: str):
+    fig = make_subplots(specs=[[{"secondary_y": True}]])
+    labels = np.where(
+        bins["products"] == 1,
+        "#" + bins["first_rank"].astype(str),
+        "#" + bins["first_rank"].astype(str) + "–" + bins["last_rank"].astype(str),
+    )
+    fig.add_trace(
+        go.Bar(
+            x=(bins["first_rank"] + bins["last_rank"]) / 2,
+            width=bins["products"],
+            y=bins["value"] / bins["products"],
+            customdata=np.column_stack([labels, bins["value"]]),
+            hovertemplate="Products %{customdata[0]}<br>Revenue: $%{customdata[1]:,.0f}"
+            "<br>Per product: $%{y:,.0f}<extra></extra>",
+            name="Revenue per product",
+            marker=dict(color=COLORS["blue"]["500"], line=dict(width=0)),
+        ),
+        secondary_y=False,
+    )
+    # Cumulative share at each bar's last rank, starting from the origin
+    fig.add_trace(
+        go.Scattergl(
+            x=np.concatenate([[0], bins["last_rank"]]),
+            y=np.concatenate([[0], bins["cum_pct"]]),
+            mode="lines",
+            name="Cumulative share",
+            line=dict(color=COLORS["emerald"]["500"]),
+            hovertemplate="Top %{x:,} products: %{y:.1f}%<extra></extra>",
+        ),
+        secondary_y=True,
+    )
+    fig.add_hline(
+        y=80, line_dash="dot", line_color=COLORS["slate"]["400"], secondary_y=True
+    )
+    fig.update_layout(title_text=title, bargap=0, height=500, hovermode="closest")
+    fig.update_xaxes(title_text="Product rank by revenue")
+    fig.update_yaxes(title_text="Revenue per product ($)", secondary_y=False)
+    fig.update_yaxes(
+        title_text="Cumulative revenue (%)", range=[0, 100], secondary_y=True
+    )
+    return fig
+
+
+def pareto_chart(df: pd.DataFrame, top_n: int = 50, n_bins: int = 100):
+    """Cached Pareto figure for a product frame with a `revenue` column."""
+    bins = pareto_bins(df, "revenue", top_n, n_bins)
+    title = f"Revenue Pareto ({len(df):,} products)"
+    return cached_figure(_pareto_figure, bins, title=title)
@@ -2,7 +2,9 @@ import matplotlib.pyplot as plt
 import numpy as np
 import streamlit as st
 
-from .data_queries import q_product_sales, q_rfm
+from .data_queries import q_product_sales
+from .pareto import pareto_chart
+from .rfm import rfm_segments
 from .utils import get_date_inputs, get_date_range
 
 
@@ -19,29 +21,13 @@ def product_merchandising():
     top20 = df.head(int(len(df) * 0.2))["revenue"].sum() / total_rev * 100
     st.metric("Top 20% Products Revenue", f"{top20:.1f}% of total")
 
-    # Pareto chart
+    # Pareto chart – top products exact, the long tail binned by rank
     st.subheader("Pareto Chart")
-    fig, ax = plt.subplots()
-    ax2 = ax.twinx()
-    ax.bar(df["product_id"], df["revenue"])
-    ax2.plot(df["product_id"], df["cum_pct"], color="green")
-    st.pyplot(fig)
-
-    # RFM segmentation
-    rfm = q_rfm(start, end)
-    q1 = rfm.quantile(0.33)
-    q2 = rfm.quantile(0.66)
-
-    def r_score(x):
-        return 3 if x <= q1.recency else 2 if x <= q2.recency else 1
-
-    def fm_score(x, col):
-        return 1 if x <= q1[col] else 2 if x <= q2[col] else 3
+    st.plotly_chart(pareto_chart(df), use_container_width=True)
 
-    rfm["R"] = rfm["recency"].apply(r_score)
-    rfm["F"] = rfm["frequency"].apply(lambda x: fm_score(x, "frequency"))
-    rfm["M"] = rfm["monetary"].apply(lambda x: fm_score(x, "monetary"))
-    rfm["Segment"] = rfm["R"].astype(str) + rfm["F"].astype(str) + rfm["M"].astype(str)
+    # RFM segmentation (scored per customer with NumPy, cached per range)
+    n_buckets = st.slider("RFM buckets per metric", 2, 5, 3)
+    rfm = rfm_segments(start, end, n_buckets)
     seg_counts = rfm["Segment"].value_counts().sort_index()
     st.subheader("RFM Segment Counts")
     st.bar_chart(seg_counts)
@@ -1,6 +1,8 @@
 import plotly.express as px
 import streamlit as st
 
+from lib.downsample import chart_points, full_resolution_toggle
+
 from .data_queries import q_daily_sales_trend
 from .utils import get_date_inputs, get_date_range
 
@@ -17,6 +19,13 @@ def daily_sales_trend():
         return
 
     # Display Sales and Profit Trend using Plotly Express
+    full_resolution = full_resolution_toggle(key="sales_trend_full_resolution")
+    trend_df = chart_points(
+        trend_df,
+        "day",
+        ["total_sales", "total_profit"],
+        full_resolution=full_resolution,
+    )
     fig_sales_profit_trend = px.line(
         trend_df,
         x="day",
@@ -1,45 +1,21 @@
 import plotly.express as px  # Import Plotly Express
 import streamlit as st
 
-from lib.bigquery_client import bigquery_client
-
-
-@st.cache_data(ttl=3600)  # Cache data for 1 hour
-def get_user_behavior_data():
-    query = """
-    SELECT
-        FORMAT_DATE('%Y-%m-%d', PARSE_DATE('%Y%m%d', date)) AS date,
-        fullVisitorId,
-        (SELECT MAX(IF(hit.type = 'PAGE', 1, 0)) FROM UNNEST(hits) AS hit) AS is_pageview,
-        device.deviceCategory AS deviceCategory,
-        channelGrouping,
-        totals.visits,
-        totals.pageviews,
-        totals.timeOnSite,
-        totals.bounces,
-        totals.newVisits
-    FROM `bigquery-public-data.google_analytics_sample.ga_sessions_*`
-    WHERE _TABLE_SUFFIX BETWEEN '20170701' AND '20170731'
-    """
-    df = bigquery_client.query(query).to_dataframe()
-    return df
+from .daily_cube import get_daily_cube, rollup
 
 
 @st.fragment
-def channel_metrics_comparison_chart():
+def channel_metrics_comparison_chart(start, end):
     # Fetch the data
-    data = get_user_behavior_data()
-
-    # Aggregate core metrics by channel
-    metrics_df = (
-        data.groupby("channelGrouping")
-        .agg(
-            avg_pageviews=("pageviews", "mean"),
-            avg_session_duration=("timeOnSite", "mean"),
-            bounce_rate=("bounces", "mean"),
-            total_sessions=("visits", "sum"),  # for reference or filtering
-        )
-        .reset_index()
+    cube = get_daily_cube(start, end)
+
+    # Aggregate core metrics by channel (means over non-null sessions)
+    totals = rollup(cube, ["channelGrouping"])
+    metrics_df = totals[["channelGrouping"]].assign(
+        avg_pageviews=totals["pageviews"] / totals["pageviews_n"],
+        avg_session_duration=totals["time_on_site"] / totals["time_on_site_n"],
+        bounce_rate=totals["bounces"] / totals["bounces_n"],
+        total_sessions=totals["visits"],
     )
 
     # Convert session duration from seconds to minutes
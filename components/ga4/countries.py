@@ -1,52 +1,33 @@
 import plotly.express as px  # Import Plotly Express
 import streamlit as st
 
-from lib.bigquery_client import bigquery_client
-
-
-@st.cache_data(ttl=3600)  # Cache data for 1 hour
-def get_user_behavior_data():
-    query = """
-    SELECT
-        FORMAT_DATE('%Y-%m-%d', PARSE_DATE('%Y%m%d', date)) AS date,
-        fullVisitorId,
-        (SELECT MAX(IF(hit.type = 'PAGE', 1, 0)) FROM UNNEST(hits) AS hit) AS is_pageview,
-        device.deviceCategory AS deviceCategory,
-        channelGrouping,
-        totals.visits,
-        totals.pageviews,
-        totals.timeOnSite,
-        totals.newVisits,
-        totals.bounces,
-        geoNetwork.country AS country
-    FROM `bigquery-public-data.google_analytics_sample.ga_sessions_*`
-    WHERE _TABLE_SUFFIX BETWEEN '20170701' AND '20170731'
-    """
-    df = bigquery_client.query(query).to_dataframe()
-    return df
+from lib.figure_cache import cached_figure
 
+from .daily_cube import get_daily_cube, rollup
 
-@st.fragment
-def country_analysis_fragment():
+
+# Shared per date window, so reruns skip both the roll-up and (through
+# cached_figure) the figure builds; do not mutate the result
+@st.cache_resource(ttl=86400, max_entries=16, show_spinner=False)
+def country_metrics(start, end):
     # Fetch the data
-    data = get_user_behavior_data()
-
-    # Aggregate core metrics by country
-    metrics_df = (
-        data.groupby("country")
-        .agg(
-            total_sessions=("visits", "sum"),
-            avg_pageviews=("pageviews", "mean"),
-            avg_session_duration=("timeOnSite", "mean"),
-            bounce_rate=("bounces", "mean"),
-        )
-        .reset_index()
+    cube = get_daily_cube(start, end)
+
+    # Aggregate core metrics by country (means over non-null sessions)
+    totals = rollup(cube, ["country"])
+    metrics_df = totals[["country"]].assign(
+        avg_pageviews=totals["pageviews"] / totals["pageviews_n"],
+        avg_session_duration=totals["time_on_site"] / totals["time_on_site_n"],
+        bounce_rate=totals["bounces"] / totals["bounces_n"],
+        total_sessions=totals["visits"],
     )
 
     # Convert session duration from seconds to minutes
     metrics_df["avg_session_duration_min"] = metrics_df["avg_session_duration"] / 60
+    return metrics_df
 
-    # --- 1) World map of total sessions by country ---
+
+def _sessions_map_figure(metrics_df):
     fig_map = px.choropleth(
         metrics_df,
         locations="country",  # Country names
@@ -78,11 +59,10 @@ def country_analysis_fragment():
             title="Sessions", ticks="outside", lenmode="fraction", len=0.5
         ),
     )
+    return fig_map
 
-    st.plotly_chart(fig_map, use_container_width=True)
 
-    # --- 2) Top 10 countries by total sessions (bar chart) ---
-    top_countries = metrics_df.nlargest(10, "total_sessions")
+def _top_countries_figure(top_countries):
     fig_bar = px.bar(
         top_countries,
         x="country",
@@ -91,9 +71,10 @@ def country_analysis_fragment():
         labels={"country": "Country", "total_sessions": "Total Sessions"},
     )
     fig_bar.update_layout(xaxis_tickangle=-45)
-    st.plotly_chart(fig_bar, use_container_width=True)
+    return fig_bar
 
-    # --- 3) Comparison of average metrics for top 5 countries ---
+
+def _compare_figure(top_countries):
     compare_df = top_countries.nlargest(5, "total_sessions")[
         [
             "country",
@@ -119,4 +100,23 @@ def country_analysis_fragment():
     fig_compare.update_layout(
         xaxis_title="Metric", yaxis_title="Value", legend_title="Country"
     )
+    return fig_compare
+
+
+@st.fragment
+def country_analysis_fragment(start, end):
+    metrics_df = country_metrics(start, end)
+
+    # Figures are rebuilt only when the aggregated frame changes
+    # --- 1) World map of total sessions by country ---
+    fig_map = cached_figure(_sessions_map_figure, metrics_df)
+    st.plotly_chart(fig_map, use_container_width=True)
+
+    # --- 2) Top 10 countries by total sessions (bar chart) ---
+    top_countries = metrics_df.nlargest(10, "total_sessions")
+    fig_bar = cached_figure(_top_countries_figure, top_countries)
+    st.plotly_chart(fig_bar, use_container_width=True)
+
+    # --- 3) Comparison of average metrics for top 5 countries ---
+    fig_compare = cached_figure(_compare_figure, top_countries)
     st.plotly_chart(fig_compare, use_container_width=True)
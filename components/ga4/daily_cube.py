@@ -0,0 +1,204 @@
+"""
+Pre-aggregated GA4 session cube: date × device × browser × channel × country.
+
+One scan of the ga_sessions_* shards yields additive session measures plus a
+HyperLogLog sketch of the visitors in each cell (see `lib.hll`), so the Basic
+Analysis charts are all roll-ups of the same cached frame. The cube is loaded
+per day through `DailyRangeCache`, like the session extract.
+"""
+
+from datetime import date
+from typing import Dict, List, Tuple
+
+import numpy as np
+import pandas as pd
+import pyarrow as pa
+import pyarrow.compute as pc
+import streamlit as st
+
+from lib import hll
+from lib.memory_footprint import track_frame
+from lib.query_backend import run_query_arrow
+from lib.range_cache import DailyRangeCache
+
+from .session_extract import EXTRACT_TTL
+from .utils import table_suffix
+
+DIMENSIONS = ["deviceCategory", "browser", "channelGrouping", "country"]
+MEASURES = [
+    "sessions",  # rows
+    "visits",
+    "pageviews",
+    "pageviews_n",  # sessions with non-null pageviews (for means)
+    "time_on_site",
+    "time_on_site_n",  # sessions with non-null timeOnSite
+    "bounces",
+    "bounces_n",  # sessions with non-null bounces
+    "new_visits",
+]
+
+
+def _fetch_cube(start: date, end: date, ttl: int = EXTRACT_TTL) -> pd.DataFrame:
+    # Aggregate per (cell, register) first, then per cell, so the sketch and the
+    # additive measures come out of a single scan
+    query = f"""
+    WITH sessions AS (
+      SELECT
+        PARSE_DATE('%Y%m%d', date) AS date,
+        device.deviceCategory AS deviceCategory,
+        device.browser AS browser,
+        channelGrouping,
+        geoNetwork.country AS country,
+        FARM_FINGERPRINT(fullVisitorId) AS visitor_hash,
+        totals.visits,
+        totals.pageviews,
+        totals.timeOnSite,
+        totals.bounces,
+        totals.newVisits
+      FROM `bigquery-public-data.google_analytics_sample.ga_sessions_*`
+      WHERE _TABLE_SUFFIX BETWEEN '{table_suffix(start)}' AND '{table_suffix(end)}'
+    ),
+    registers AS (
+      SELECT
+        date, deviceCategory, browser, channelGrouping, country,
+        {hll.register_sql("visitor_hash")} AS reg,
+        MAX({hll.rho_sql("visitor_hash")}) AS rho,
+        COUNT(*) AS sessions,
+        SUM(visits) AS visits,
+        SUM(pageviews) AS pageviews,
+        COUNT(pageviews) AS pageviews_n,
+        SUM(timeOnSite) AS time_on_site,
+        COUNT(timeOnSite) AS time_on_site_n,
+        SUM(bounces) AS bounces,
+        COUNT(bounces) AS bounces_n,
+        SUM(newVisits) AS new_visits
+      FROM sessions
+      GROUP BY date, deviceCategory, browser, channelGrouping, country, reg
+    )
+    SELECT
+      date, deviceCategory, browser, channelGrouping, country,
+      SUM(sessions) AS sessions,
+      SUM(visits) AS visits,
+      SUM(pageviews) AS pageviews,
+      SUM(pageviews_n) AS pageviews_n,
+      SUM(time_on_site) AS time_on_site,
+      SUM(time_on_site_n) AS time_on_site_n,
+      SUM(bounces) AS bounces,
+      SUM(bounces_n) AS bounces_n,
+      SUM(new_visits) AS new_visits,
+      ARRAY_AGG({hll.pack_sql("reg", "rho")}) AS visitor_sketch
+    FROM registers
+    GROUP BY date, deviceCategory, browser, channelGrouping, country
+    """
+    table = run_query_arrow(query, ttl=ttl)
+    df = table.drop_columns(["visitor_sketch"]).to_pandas()
+    df["date"] = pd.to_datetime(df["date"])
+    for col in DIMENSIONS:
+        df[col] = df[col].astype("category")
+    df[MEASURES] = df[MEASURES].fillna(0)
+    df = df.astype({col: np.int32 for col in MEASURES} | {"time_on_site": np.float64})
+    # Keep the sketches in Arrow (one flat int32 buffer) instead of numpy objects
+    sketches = pc.cast(table["visitor_sketch"], pa.list_(pa.int32()))
+    df["visitor_sketch"] = pd.arrays.ArrowExtensionArray(sketches)
+    return df
+
+
+@st.cache_resource(ttl=EXTRACT_TTL)  # one set of daily partitions per worker
+def _cube_partitions() -> DailyRangeCache:
+    return DailyRangeCache(_fetch_cube, day_col="date")
+
+
+def get_daily_cube(start: date, end: date) -> pd.DataFrame:
+    """Cube cells for [start, end]; shared by all sessions, do not mutate."""
+    partitions = _cube_partitions()
+    with st.spinner("Loading GA4 daily cube …"):
+        df = partitions.get(start, end)
+    track_frame("GA4 daily cube", partitions.frame)
+    return df
+
+
+def _merge_sketches(cube: pd.DataFrame, group_ids: np.ndarray, n_groups: int):
+    """Dense visitor registers per group from the cube's packed sketches."""
+    sketches = pa.array(cube["visitor_sketch"])
+    lengths = pc.list_value_length(sketches).to_numpy(zero_copy_only=False)
+    packed = pc.list_flatten(sketches).to_numpy(zero_copy_only=False)
+    return hll.merge(np.repeat(group_ids, lengths), packed, n_groups)
+
+
+def rollup(
+    cube: pd.DataFrame, by: List[str], with_visitors: bool = False
+) -> pd.DataFrame:
+    """Sum the additive measures over `by`.
+
+    `by=[]` returns a single row for the whole cube. With `with_visitors`, the
+    groups' sketches are merged and a `visitors` estimate is added; only ask
+    for it when unique visitors are shown, the merge touches every register.
+    """
+    if by:
+        grouped = cube.groupby(by, observed=True, dropna=False, sort=True)
+        out = grouped[MEASURES].sum().reset_index()
+    else:
+        out = pd.DataFrame({col: [cube[col].sum()] for col in MEASURES})
+    if not with_visitors:
+        return out
+
+    if by:
+        group_ids = grouped.ngroup().to_numpy()
+    else:
+        group_ids = np.zeros(len(cube), dtype=np.int64)
+    registers = _merge_sketches(cube, group_ids, len(out))
+    out["visitors"] = np.rint(hll.estimate(registers)).astype(np.int64)
+    return out
+
+
+# ----------
+# Unique visitors over arbitrary ranges
+# ----------
+@st.cache_resource(ttl=EXTRACT_TTL)
+def _visitor_registers_by_day() -> Dict[pd.Timestamp, np.ndarray]:
+    return {}  # day -> dense uint8 registers (hll.M bytes)
+
+
+def daily_visitor_registers(
+    start: date, end: date
+) -> Tuple[pd.DatetimeIndex, np.ndarray]:
+    """Dense visitor sketches for each day in [start, end], as (n_days, hll.M).
+
+    Each day is merged from the cube once and cached, so unique visitors over
+    any range (week, month, custom window) is a max over a few KiB per day.
+    """
+    cache = _visitor_registers_by_day()
+    days = pd.date_range(start, end)
+    missing = days[~days.isin(list(cache))]
+    if len(missing):
+        cube = get_daily_cube(missing[0].date(), missing[-1].date())
+        day_ids = missing.get_indexer(cube["date"])
+        cube, day_ids = cube[day_ids >= 0], day_ids[day_ids >= 0]
+        for day, registers in zip(
+            missing, _merge_sketches(cube, day_ids, len(missing))
+        ):
+            cache[day] = registers
+    return days, np.stack([cache[day] for day in days])
+
+
+def unique_visitors(start: date, end: date, freq: str = "D") -> pd.DataFrame:
+    """Estimated unique visitors per period ("D", "W", "M") within [start, end].
+
+    Periods are labelled with their first day inside the window.
+    """
+    days, registers = daily_visitor_registers(start, end)
+    periods = days.to_period(freq)
+    first = np.flatnonzero(np.r_[True, periods[1:] != periods[:-1]])
+    merged = np.maximum.reduceat(registers, first, axis=0)
+    return pd.DataFrame(
+        {
+            "session_date": days[first],
+            "unique_visitors": np.rint(hll.estimate(merged)).astype(np.int64),
+        }
+    )
+
+
+def window_unique_visitors(start: date, end: date) -> int:
+    """Estimated unique visitors over the whole window."""
+    _, registers = daily_visitor_registers(start, end)
+    return int(np.rint(hll.estimate(registers.max(axis=0))[0]))
@@ -1,26 +1,44 @@
+from datetime import datetime
+
 import pandas as pd
 import streamlit as st
 
-from lib.bigquery_client import bigquery_client
+from lib.query_backend import TableMetadata, get_query_backend
+
+CATALOG_TABLE = "bigquery-public-data.google_analytics_sample.ga_sessions_20170801"
+PREVIEW_ROWS = 10
+
+
+@st.cache_data(ttl=600)
+def get_table_metadata(table_id: str) -> TableMetadata:
+    # tables.get: no query job, no bytes billed
+    return get_query_backend().table_metadata(table_id)
 
 
-@st.cache_data
-def query_public_bq():
-    query = """
-            SELECT *
-            FROM `bigquery-public-data.google_analytics_sample.ga_sessions_20170801`
-            LIMIT 10
-            """
-    result = bigquery_client.query(query)
-    return result.to_dataframe()
+@st.cache_data(max_entries=16)
+def get_table_preview(
+    table_id: str, last_modified: datetime, max_rows: int = PREVIEW_ROWS
+) -> pd.DataFrame:
+    # Keyed by last_modified, so the preview is only re-read when the table changes
+    return get_query_backend().preview_rows(table_id, max_rows).to_pandas()
 
 
 @st.fragment
 def data_catalog():
+    metadata = get_table_metadata(CATALOG_TABLE)
+    st.caption(
+        f"`{CATALOG_TABLE}` · {metadata.num_rows:,} rows · "
+        f"{metadata.num_bytes / 1024**2:,.1f} MiB · "
+        f"last modified {metadata.last_modified:%Y-%m-%d %H:%M} UTC"
+    )
+
     # Display the DataFrame
-    df = query_public_bq()
+    df = get_table_preview(CATALOG_TABLE, metadata.last_modified)
     st.dataframe(df, use_container_width=True)  # Display full width
 
+    with st.expander(f"🧬 Full schema ({len(metadata.schema)} fields)"):
+        st.dataframe(metadata.schema, use_container_width=True, hide_index=True)
+
     st.markdown("---")
     st.header("Data Column Descriptions")
     st.write("Below are the main columns in this dataset and their descriptions.")
@@ -1,22 +1,41 @@
+from datetime import date
+
 import polars as pl
 import streamlit as st
 from pygwalker.api.streamlit import StreamlitRenderer
 
-from lib.bigquery_client import bigquery_client
+from lib.query_backend import run_query_arrow
+
+from .session_extract import EXTRACT_TTL
+from .utils import table_suffix
+
+# Low-cardinality dimensions, dictionary-encoded for the explorer
+CATEGORICAL_COLUMNS = [
+    "trafficSource_source",
+    "trafficSource_medium",
+    "trafficSource_campaign",
+    "browser",
+    "operatingSystem",
+    "device_category",
+    "continent",
+    "geo_country",
+    "channelGrouping",
+]
 
 
-@st.cache_data
-def query_public_bq():
-    query = """
+def query_public_bq(start: date, end: date) -> pl.DataFrame:
+    # Keep native types: numeric totals stay numeric and dates/timestamps stay
+    # temporal, so PyGWalker aggregates numbers instead of strings
+    query = f"""
             SELECT
               fullVisitorId                                   AS visitorId,
-              CAST(visitId       AS STRING)                   AS visitId,
-              CAST(visitStartTime AS STRING)                  AS visitStartTime,
-              date,
+              visitId,
+              TIMESTAMP_SECONDS(visitStartTime)               AS visitStartTime,
+              PARSE_DATE('%Y%m%d', date)                      AS date,
 
-              CAST(totals.hits                     AS STRING) AS totals_hits,
-              CAST(totals.pageviews                AS STRING) AS totals_pageviews,
-              CAST(totals.timeOnSite               AS STRING) AS totals_timeOnSite,
+              totals.hits                    AS totals_hits,
+              totals.pageviews               AS totals_pageviews,
+              totals.timeOnSite              AS totals_timeOnSite,
 
               trafficSource.source           AS trafficSource_source,
               trafficSource.medium           AS trafficSource_medium,
@@ -34,15 +53,25 @@ def query_public_bq():
               channelGrouping,
 
             FROM `bigquery-public-data.google_analytics_sample.ga_sessions_*`
-            WHERE _TABLE_SUFFIX BETWEEN '20170701' AND '20170731'
+            WHERE _TABLE_SUFFIX BETWEEN '{table_suffix(start)}' AND '{table_suffix(end)}'
             """
-    result = bigquery_client.query(query)
-    df = pl.from_arrow(result.to_arrow())
-    return df
+    # Arrow → polars is zero-copy; only the categorical casts allocate
+    df = pl.from_arrow(run_query_arrow(query, ttl=EXTRACT_TTL))
+    return df.with_columns(
+        pl.col(CATEGORICAL_COLUMNS).cast(pl.Categorical),
+        pl.col("totals_hits", "totals_pageviews", "totals_timeOnSite").cast(pl.Int32),
+    )
+
+
+@st.cache_resource(ttl=EXTRACT_TTL, max_entries=2)
+def get_pyg_renderer(start: date, end: date) -> StreamlitRenderer:
+    # kernel_computation runs the explorer's aggregations in DuckDB directly on
+    # the frame's Arrow buffers, so only aggregated results reach the browser.
+    # The renderer is shared so the frame is parsed once per window and worker.
+    return StreamlitRenderer(query_public_bq(start, end), kernel_computation=True)
 
 
-def eda_pygwalker():
-    # Load data
-    df = query_public_bq()
-    walker = StreamlitRenderer(df, kernel_computation=True)
+def eda_pygwalker(start, end):
+    with st.spinner("Loading GA4 sessions for exploration …"):
+        walker = get_pyg_renderer(start, end)
     walker.explorer()
@@ -0,0 +1,105 @@
+from typing import List, Optional
+
+import numpy as np
+import pandas as pd
+import plotly.graph_objects as go
+import streamlit as st
+
+from lib.tailwind_colors import COLORS
+
+from .hit_extract import HitExtract, get_hit_extract
+from .utils import window_label
+
+# Google Merchandise Store checkout path, used as the default funnel
+DEFAULT_STEPS = [
+    "/home",
+    "/basket.html",
+    "/signin.html",
+    "/yourinfo.html",
+    "/payment.html",
+    "/revieworder.html",
+    "/ordercompleted.html",
+]
+MAX_STEP_OPTIONS = 200  # most-hit pages offered as funnel steps
+
+
+def funnel_counts(
+    extract: HitExtract, steps: List[np.ndarray], max_gap: Optional[int] = None
+) -> np.ndarray:
+    """Sessions reaching each step of an ordered funnel.
+
+    `steps` holds the page ids accepted at each step. A session reaches step k
+    when it has hits matching steps 1..k in that order; with `max_gap`, at most
+    that many other hits may sit between two consecutive matched steps.
+
+    All sessions are evaluated at once over the hit extract: `reached` keeps
+    every hit position at which the current step can be completed. A hit
+    matching the next step is reachable iff the closest reached position before
+    it (found with searchsorted) is in the same session and within the gap.
+    """
+    session_of_hit = np.repeat(np.arange(len(extract.lengths)), extract.lengths)
+    counts = np.zeros(len(steps), dtype=np.int64)
+    reached = None
+    for k, page_ids in enumerate(steps):
+        candidates = np.flatnonzero(np.isin(extract.page_ids, page_ids))
+        if reached is not None:
+            prev = np.searchsorted(reached, candidates, side="left") - 1
+            ok = prev >= 0
+            prev_pos = reached[np.maximum(prev, 0)]
+            ok &= session_of_hit[prev_pos] == session_of_hit[candidates]
+            if max_gap is not None:
+                ok &= candidates - prev_pos - 1 <= max_gap
+            candidates = candidates[ok]
+        reached = candidates
+        if len(reached) == 0:
+            break
+        counts[k] = len(np.unique(session_of_hit[reached]))
+    return counts
+
+
+@st.fragment
+def funnel_chart(start, end):
+    extract = get_hit_extract(start, end)
+
+    # Offer the most-hit pages only, not the whole path vocabulary; default to
+    # the checkout path where present
+    hits_per_page = np.bincount(extract.page_ids, minlength=len(extract.pages))
+    top = np.argsort(-hits_per_page, kind="stable")[:MAX_STEP_OPTIONS]
+    options = extract.pages[top].tolist()
+    default = [page for page in DEFAULT_STEPS if page in set(options)] or options[:3]
+
+    cols = st.columns([3, 1])
+    step_pages = cols[0].multiselect(
+        "Funnel steps (in order)", options, default=default, max_selections=10
+    )
+    gap = cols[1].number_input(
+        "Max pages between steps",
+        min_value=0,
+        value=None,
+        step=1,
+        placeholder="Any",
+        help="Leave empty to allow any number of pages between steps.",
+    )
+    if not step_pages:
+        st.info("Select at least one page to build a funnel.")
+        return
+
+    page_index = pd.Index(extract.pages)
+    steps = [page_index.get_indexer([page]) for page in step_pages]
+    counts = funnel_counts(extract, steps, None if gap is None else int(gap))
+
+    funnel_fig = go.Figure(
+        go.Funnel(
+            y=step_pages,
+            x=counts,
+            textinfo="value+percent initial+percent previous",
+            marker=dict(color=COLORS["blue"]["500"]),
+        )
+    )
+    funnel_fig.update_layout(
+        title_text=f"Session Funnel ({window_label(start, end)})",
+        yaxis_title="Step",
+        height=150 + 60 * len(step_pages),
+    )
+
+    st.plotly_chart(funnel_fig, use_container_width=True)
@@ -0,0 +1,187 @@
+"""
+Hit-level extract of GA4 page sequences in a compact, CSR-like layout.
+
+Each session's page paths (ordered by hitNumber) are fetched once per day and
+persisted as `ga_hits_YYYYMMDD.parquet` under HIT_EXTRACT_DIR. For a date
+window the daily files are assembled into three flat buffers:
+
+- `pages`: the page-path vocabulary,
+- `page_ids`: every hit's page as an int32 index into `pages`,
+- `offsets`: session i owns `page_ids[offsets[i]:offsets[i + 1]]`,
+
+plus per-session columns (date, bounces). Landing pages, exit pages,
+transitions and funnels are computed from these buffers with NumPy instead of
+UNNESTing `hits` in the warehouse for every analysis.
+
+The sample dataset is static, so daily files never expire; delete the
+directory to rebuild them. Days that come back without sessions (a shard
+missing from the mirror, a transient empty result) are not written, so a later
+load queries them again.
+"""
+
+import os
+import uuid
+from dataclasses import dataclass
+from datetime import date, timedelta
+from pathlib import Path
+
+import numpy as np
+import pandas as pd
+import pyarrow as pa
+import pyarrow.compute as pc
+import pyarrow.parquet as pq
+import streamlit as st
+
+from lib.query_backend import get_query_backend, run_query_arrow
+from lib.range_cache import contiguous_runs
+
+from .session_extract import EXTRACT_TTL
+from .utils import table_suffix
+
+MAX_DEPTH = 10  # transition steps deeper in a session are bucketed into this one
+
+_SCHEMA = pa.schema(
+    [
+        ("date", pa.date32()),
+        ("bounces", pa.int8()),
+        ("pages", pa.list_(pa.string())),
+    ]
+)
+
+
+@dataclass(frozen=True)
+class HitExtract:
+    pages: np.ndarray  # page-path vocabulary (object array of str)
+    page_ids: np.ndarray  # int32, one entry per hit
+    offsets: np.ndarray  # int64, len(sessions) + 1
+    sessions: pd.DataFrame  # date, bounces
+
+    @property
+    def lengths(self) -> np.ndarray:
+        return np.diff(self.offsets)
+
+
+# ----------
+# Daily Parquet partitions
+# ----------
+def _extract_dir() -> Path:
+    # Separate directories per backend; the mirror and BigQuery may differ
+    root = Path(os.getenv("HIT_EXTRACT_DIR", ".cache/hit_extract"))
+    path = root / get_query_backend().name
+    path.mkdir(parents=True, exist_ok=True)
+    return path
+
+
+def _day_path(day: date) -> Path:
+    return _extract_dir() / f"ga_hits_{table_suffix(day)}.parquet"
+
+
+def _fetch_days(start: date, end: date):
+    """Query the page sequences for [start, end] and persist one file per day
+    that has sessions."""
+    query = f"""
+    SELECT
+      PARSE_DATE('%Y%m%d', date) AS date,
+      totals.bounces AS bounces,
+      ARRAY(
+        SELECT hit.page.pagePath FROM UNNEST(hits) AS hit ORDER BY hit.hitNumber
+      ) AS pages
+    FROM `bigquery-public-data.google_analytics_sample.ga_sessions_*`
+    WHERE _TABLE_SUFFIX BETWEEN '{table_suffix(start)}' AND '{table_suffix(end)}'
+    """
+    table = run_query_arrow(query, ttl=EXTRACT_TTL)
+    table = table.cast(_SCHEMA)
+    for i in range((end - start).days + 1):
+        day = start + timedelta(days=i)
+        day_table = table.filter(pc.equal(table["date"], day))
+        if day_table.num_rows == 0:
+            continue
+        path = _day_path(day)
+        tmp_path = path.with_name(f".{path.name}.{uuid.uuid4().hex}.tmp")
+        pq.write_table(day_table, tmp_path)
+        os.replace(tmp_path, path)  # atomic, other workers never see partial files
+
+
+def _load_days(start: date, end: date) -> pa.Table:
+    days = [start + timedelta(days=i) for i in range((end - start).days + 1)]
+    missing = [day for day in days if not _day_path(day).exists()]
+    if missing:
+        # One query per contiguous run of days not on disk yet
+        for first, last in contiguous_runs(missing):
+            _fetch_days(first, last)
+    tables = [pq.read_table(_day_path(day)) for day in days if _day_path(day).exists()]
+    return pa.concat_tables(tables) if tables else _SCHEMA.empty_table()
+
+
+# ----------
+# Hit Extract
+# ----------
+@st.cache_resource(ttl=EXTRACT_TTL, max_entries=4, show_spinner="Loading GA4 hits …")
+def get_hit_extract(start: date, end: date) -> HitExtract:
+    """Page sequences of every session in [start, end]; shared, do not mutate."""
+    table = _load_days(start, end)
+    pages = table["pages"].combine_chunks()
+    encoded = pc.dictionary_encode(pc.fill_null(pc.list_flatten(pages), "(not set)"))
+    return HitExtract(
+        pages=encoded.dictionary.to_numpy(zero_copy_only=False),
+        page_ids=encoded.indices.to_numpy().astype(np.int32),
+        offsets=pages.offsets.to_numpy().astype(np.int64) - pages.offsets[0].as_py(),
+        sessions=table.select(["date", "bounces"]).to_pandas(),
+    )
+
+
+def landing_pages(extract: HitExtract) -> pd.DataFrame:
+    """Sessions and bounces by the first page of each session."""
+    has_hits = extract.lengths > 0
+    first = extract.page_ids[extract.offsets[:-1][has_hits]]
+    bounced = (extract.sessions["bounces"].to_numpy() == 1)[has_hits]
+    n_pages = len(extract.pages)
+    sessions = np.bincount(first, minlength=n_pages)
+    bounces = np.bincount(first[bounced], minlength=n_pages)
+    return pd.DataFrame(
+        {"landing_page": extract.pages, "sessions": sessions, "bounces": bounces}
+    ).query("sessions > 0")
+
+
+def exit_pages(extract: HitExtract) -> pd.DataFrame:
+    """Sessions by the last page of each session, with all hits on that page."""
+    has_hits = extract.lengths > 0
+    last = extract.page_ids[extract.offsets[1:][has_hits] - 1]
+    n_pages = len(extract.pages)
+    return pd.DataFrame(
+        {
+            "exit_page": extract.pages,
+            "sessions": np.bincount(last, minlength=n_pages),
+            "hits": np.bincount(extract.page_ids, minlength=n_pages),
+        }
+    ).query("sessions > 0")
+
+
+def transitions(extract: HitExtract) -> pd.DataFrame:
+    """Counts of (source_id, target_id, step) for consecutive hits in a session.
+
+    `step` is the 1-based position of the source hit, capped at MAX_DEPTH.
+    """
+    n_hits = len(extract.page_ids)
+    has_next = np.ones(n_hits, dtype=bool)
+    has_next[extract.offsets[1:][extract.lengths > 0] - 1] = False
+    src = np.flatnonzero(has_next)
+    session_start = np.repeat(extract.offsets[:-1], extract.lengths)
+    step = np.minimum(src - session_start[src] + 1, MAX_DEPTH)
+
+    # Count unique (source, target, step) triples via one packed int64 key
+    n_pages = len(extract.pages)
+    keys = (
+        extract.page_ids[src].astype(np.int64) * n_pages + extract.page_ids[src + 1]
+    ) * (MAX_DEPTH + 1) + step
+    keys, counts = np.unique(keys, return_counts=True)
+    pairs, step = np.divmod(keys, MAX_DEPTH + 1)
+    source_id, target_id = np.divmod(pairs, n_pages)
+    return pd.DataFrame(
+        {
+            "source_id": source_id.astype(np.int32),
+            "target_id": target_id.astype(np.int32),
+            "step": step.astype(np.int8),
+            "value": counts.astype(np.int32),
+        }
+    )
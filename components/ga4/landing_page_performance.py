@@ -2,46 +2,42 @@ import plotly.graph_objects as go
 import streamlit as st
 from plotly.subplots import make_subplots
 
-from lib.bigquery_client import bigquery_client
-
-
-@st.cache_data(ttl=86400)
-def landing_page_performance():
-    query = """
-    SELECT
-      hit.page.pagePath AS landing_page,
-      COUNT(*) AS sessions,
-      SUM(CASE WHEN totals.bounces = 1 THEN 1 ELSE 0 END) AS bounces,
-      ROUND(SUM(CASE WHEN totals.bounces = 1 THEN 1 ELSE 0 END) * 100.0 / COUNT(*), 2) AS bounce_rate
-    FROM `bigquery-public-data.google_analytics_sample.ga_sessions_*` AS s,
-    UNNEST(s.hits) AS hit
-    WHERE _TABLE_SUFFIX BETWEEN '20170701' AND '20170731'
-      AND hit.hitNumber = 1
-    GROUP BY landing_page
-    ORDER BY sessions DESC
-    LIMIT 10
-    """
-    df = bigquery_client.query(query).to_dataframe()
-    return df
+from lib.figure_cache import cached_figure
 
+from .hit_extract import exit_pages, get_hit_extract, landing_pages
 
-@st.fragment
-def landing_page_performance_chart():
-    # Load data
-    lp_df = landing_page_performance()
 
+# Shared per date window (no per-rerun copy, unlike st.cache_data), so an
+# unchanged rerun skips the aggregation as well as the figure build
+@st.cache_resource(ttl=86400, max_entries=16, show_spinner=False)
+def landing_page_performance(start, end):
+    # Top 10 first pages of sessions, from the local hit extract
+    df = landing_pages(get_hit_extract(start, end)).nlargest(10, "sessions")
+    df["bounce_rate"] = (df["bounces"] * 100.0 / df["sessions"]).round(2)
+    return df.reset_index(drop=True)
+
+
+@st.cache_resource(ttl=86400, max_entries=16, show_spinner=False)
+def exit_page_performance(start, end):
+    # Top 10 last pages of sessions; exit rate = exits / hits on the page
+    df = exit_pages(get_hit_extract(start, end)).nlargest(10, "sessions")
+    df["exit_rate"] = (df["sessions"] * 100.0 / df["hits"]).round(2)
+    return df.reset_index(drop=True)
+
+
+def _page_figure(df, page_col, rate_col, page_label, rate_label, title):
     # Create subplot with secondary y-axis
-    lp_fig = make_subplots(specs=[[{"secondary_y": True}]])
+    fig = make_subplots(specs=[[{"secondary_y": True}]])
 
-    truncated_labels = lp_df["landing_page"].apply(
+    truncated_labels = df[page_col].apply(
         lambda x: x if len(x) <= 25 else x[:25] + "..."
     )
 
     # Sessions on primary y-axis
-    lp_fig.add_trace(
+    fig.add_trace(
         go.Bar(
-            x=lp_df["landing_page"],
-            y=lp_df["sessions"],
+            x=df[page_col],
+            y=df["sessions"],
             name="Sessions",
             marker_color="#3b82f6",
             offsetgroup="1",
@@ -49,37 +45,65 @@ def landing_page_performance_chart():
         secondary_y=False,
     )
 
-    # Bounce Rate (%) on secondary y-axis
-    lp_fig.add_trace(
+    # Rate (%) on secondary y-axis
+    fig.add_trace(
         go.Scatter(
-            x=lp_df["landing_page"],
-            y=lp_df["bounce_rate"],
-            name="Bounce Rate (%)",
+            x=df[page_col],
+            y=df[rate_col],
+            name=rate_label,
             mode="lines+markers",
             marker=dict(color="#EF553B"),
         ),
         secondary_y=True,
     )
 
-    lp_fig.update_layout(
-        title_text="Top 10 Landing Pages: Sessions and Bounce Rate",
+    fig.update_layout(
+        title_text=title,
         barmode="group",
         bargap=0.2,
         height=600,
     )
 
-    lp_fig.update_xaxes(
+    fig.update_xaxes(
         tickmode="array",
-        tickvals=lp_df["landing_page"].tolist(),
+        tickvals=df[page_col].tolist(),
         ticktext=truncated_labels.tolist(),
         tickangle=-45,
-        title_text="Landing Page",
+        title_text=page_label,
     )
 
     # Primary Y-axis
-    lp_fig.update_yaxes(title_text="Sessions", secondary_y=False)
+    fig.update_yaxes(title_text="Sessions", secondary_y=False)
 
     # Secondary Y-axis fixed 0–100%
-    lp_fig.update_yaxes(title_text="Bounce Rate (%)", secondary_y=True, range=[0, 100])
+    fig.update_yaxes(title_text=rate_label, secondary_y=True, range=[0, 100])
+    return fig
+
 
-    st.plotly_chart(lp_fig, use_container_width=True)
+@st.fragment
+def landing_page_performance_chart(start, end):
+    landing_tab, exit_tab = st.tabs(["Landing Pages", "Exit Pages"])
+    with landing_tab:
+        lp_df = landing_page_performance(start, end)
+        lp_fig = cached_figure(
+            _page_figure,
+            lp_df,
+            page_col="landing_page",
+            rate_col="bounce_rate",
+            page_label="Landing Page",
+            rate_label="Bounce Rate (%)",
+            title="Top 10 Landing Pages: Sessions and Bounce Rate",
+        )
+        st.plotly_chart(lp_fig, use_container_width=True)
+    with exit_tab:
+        ep_df = exit_page_performance(start, end)
+        ep_fig = cached_figure(
+            _page_figure,
+            ep_df,
+            page_col="exit_page",
+            rate_col="exit_rate",
+            page_label="Exit Page",
+            rate_label="Exit Rate (%)",
+            title="Top 10 Exit Pages: Exits and Exit Rate",
+        )
+        st.plotly_chart(ep_fig, use_container_width=True)
@@ -1,34 +1,13 @@
 import plotly.express as px  # Import Plotly Express
 import streamlit as st
 
-from lib.bigquery_client import bigquery_client
-
-
-@st.cache_data(ttl=3600)  # Cache data for 1 hour
-def get_user_behavior_data():
-    query = """
-    SELECT
-        FORMAT_DATE('%Y-%m-%d', PARSE_DATE('%Y%m%d', date)) AS date,
-        fullVisitorId,
-        (SELECT MAX(IF(hit.type = 'PAGE', 1, 0)) FROM UNNEST(hits) AS hit) AS is_pageview,
-        device.deviceCategory AS deviceCategory,
-        channelGrouping,
-        totals.visits,
-        totals.pageviews,
-        totals.timeOnSite,
-        totals.bounces,
-        totals.newVisits
-    FROM `bigquery-public-data.google_analytics_sample.ga_sessions_*`
-    WHERE _TABLE_SUFFIX BETWEEN '20170701' AND '20170731'
-    """
-    df = bigquery_client.query(query).to_dataframe()
-    return df
+from .session_extract import get_session_extract
 
 
 @st.fragment
-def new_vs_returning_chart():
+def new_vs_returning_chart(start, end):
     # Fetch the data
-    data = get_user_behavior_data()
+    data = get_session_extract(start, end)
 
     # Classify each session as New or Returning
     user_type_counts = (
@@ -57,13 +36,14 @@ def new_vs_returning_chart():
 
 
 @st.fragment
-def metrics_comparison_chart():
+def metrics_comparison_chart(start, end):
     # Fetch the data
-    data = get_user_behavior_data()
+    data = get_session_extract(start, end)
 
     # Label sessions as New User or Returning User
-    data["UserType"] = (
-        data["newVisits"]
+    # (the shared extract is read-only, so derive a new frame)
+    data = data.assign(
+        UserType=data["newVisits"]
         .fillna(0)
         .apply(lambda x: "New User" if x == 1 else "Returning User")
     )
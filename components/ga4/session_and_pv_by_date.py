@@ -3,32 +3,28 @@ import plotly.graph_objects as go
 import streamlit as st
 from plotly.subplots import make_subplots
 
-from lib.bigquery_client import bigquery_client
 from lib.tailwind_colors import COLORS
 
+from .daily_cube import get_daily_cube, rollup
+from .utils import window_label
 
-@st.cache_data(ttl=86400)
-def ave_session_time_and_page_views():
-    # Define SQL to get average session time and pages per day
-    query = """
-    SELECT
-      date AS session_date,
-      AVG(totals.timeOnSite) AS avg_duration_seconds,
-      SUM(totals.pageviews) AS total_pageviews
-    FROM `bigquery-public-data.google_analytics_sample.ga_sessions_*`
-    WHERE _TABLE_SUFFIX BETWEEN '20170701' AND '20170731'
-    GROUP BY session_date
-    ORDER BY session_date
-    """
-    df = bigquery_client.query(query).to_dataframe()
-    df["session_date"] = pd.to_datetime(df["session_date"], format="%Y%m%d")
-    return df
+
+def ave_session_time_and_page_views(start, end):
+    # Average session time and pageviews per day
+    daily = rollup(get_daily_cube(start, end), ["date"])
+    return pd.DataFrame(
+        {
+            "session_date": daily["date"],
+            "avg_duration_seconds": daily["time_on_site"] / daily["time_on_site_n"],
+            "total_pageviews": daily["pageviews"],
+        }
+    )
 
 
 @st.fragment
-def session_and_pv_by_date_chart():
+def session_and_pv_by_date_chart(start, end):
     # Load session time and pageviews data
-    session_pageview_df = ave_session_time_and_page_views()
+    session_pageview_df = ave_session_time_and_page_views(start, end)
 
     # Combined chart with secondary y-axis
     session_pageview_fig = make_subplots(specs=[[{"secondary_y": True}]])
@@ -62,7 +58,7 @@ def session_and_pv_by_date_chart():
     )
     # Layout adjustments
     session_pageview_fig.update_layout(
-        title_text="Daily Pageviews and Average Session Duration (July 2017)",
+        title_text=f"Daily Pageviews and Average Session Duration ({window_label(start, end)})",
         legend=dict(x=0.01, y=0.99, bordercolor="LightGray", borderwidth=1),
     )
 
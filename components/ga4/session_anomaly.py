@@ -1,69 +1,64 @@
+import numpy as np
+import pandas as pd
 import plotly.graph_objects as go
 import streamlit as st
 
-from lib.bigquery_client import bigquery_client
+from lib.anomaly_detection import DETECTORS, detect
 from lib.tailwind_colors import COLORS
 
+from .daily_cube import get_daily_cube
 
-@st.cache_data(ttl=86400)
-def detect_session_anomalies():
-    query = """
-    WITH daily AS (
-    SELECT
-        PARSE_DATE('%Y%m%d', date) AS session_date,
-        COUNT(*) AS sessions
-    FROM `bigquery-public-data.google_analytics_sample.ga_sessions_*`
-    WHERE _TABLE_SUFFIX BETWEEN '20170701' AND '20170731'
-    GROUP BY session_date
-    ),
-    calculated_metrics AS (
-    SELECT
-        session_date,
-        sessions,
-        AVG(sessions) OVER (
-        ORDER BY session_date
-        ROWS BETWEEN 6 PRECEDING AND CURRENT ROW
-        ) AS moving_avg,
-        STDDEV_POP(sessions) OVER (
-        ORDER BY session_date
-        ROWS BETWEEN 6 PRECEDING AND CURRENT ROW
-        ) AS moving_std
-    FROM daily
+DIMENSION_LABELS = {
+    "channelGrouping": "Channel",
+    "deviceCategory": "Device",
+    "country": "Country",
+}
+
+
+def daily_session_matrix(start, end, by=None) -> pd.DataFrame:
+    """Sessions per day (rows, every day in the window) and `by` value (columns)."""
+    cube = get_daily_cube(start, end)
+    if by is None:
+        matrix = cube.groupby("date")["sessions"].sum().to_frame("sessions")
+    else:
+        matrix = (
+            cube.groupby(["date", by], observed=True)["sessions"]
+            .sum()
+            .unstack(fill_value=0)
+        )
+    days = pd.date_range(start, end, name="session_date")
+    return matrix.reindex(days, fill_value=0)
+
+
+def detect_session_anomalies(start, end, method="Rolling z-score", window=7):
+    daily = daily_session_matrix(start, end)
+    detection = detect(daily.to_numpy(), method, window)
+    daily["expected"] = detection.expected[:, 0]
+    daily["spread"] = detection.spread[:, 0]
+    daily["score"] = detection.score[:, 0]
+    return daily.reset_index()
+
+
+def _detector_controls(key: str):
+    cols = st.columns(3)
+    method = cols[0].selectbox("Detector", list(DETECTORS), key=f"{key}_method")
+    window = cols[1].slider("Window (days)", 3, 28, 7, key=f"{key}_window")
+    threshold = cols[2].slider(
+        "Threshold (σ)", 0.5, 5.0, 2.0, step=0.5, key=f"{key}_threshold"
     )
-    SELECT
-    session_date,
-    sessions,
-    moving_avg,
-    moving_std,
-    CASE
-        WHEN sessions > moving_avg + 1 * moving_std
-        THEN TRUE
-        ELSE FALSE
-    END AS is_positive_anomaly,
-    CASE
-        WHEN sessions < moving_avg - 1 * moving_std
-        THEN TRUE
-        ELSE FALSE
-    END AS is_negative_anomaly
-    FROM calculated_metrics
-    ORDER BY session_date
-    """
-    df = bigquery_client.query(query).to_dataframe()
-    return df
+    return method, window, threshold
 
 
 @st.fragment
-def session_anomaly_chart():
-    # Load anomaly data
-    anomaly_df = detect_session_anomalies()
-    # Map colors: red for anomalies, blue otherwise
-    colors = anomaly_df.apply(
-        lambda row: COLORS["pink"]["500"]
-        if row["is_positive_anomaly"]  # sessions > moving_avg + σ
-        else COLORS["yellow"]["500"]
-        if row["is_negative_anomaly"]  # sessions < moving_avg - σ
-        else COLORS["blue"]["500"],  # normal range
-        axis=1,
+def session_anomaly_chart(start, end):
+    method, window, threshold = _detector_controls("anomaly")
+    anomaly_df = detect_session_anomalies(start, end, method, window)
+
+    # Pink above the band, yellow below it, blue in the normal range
+    colors = np.select(
+        [anomaly_df["score"] > threshold, anomaly_df["score"] < -threshold],
+        [COLORS["pink"]["500"], COLORS["yellow"]["500"]],
+        default=COLORS["blue"]["500"],
     )
 
     # Create bar chart with anomaly highlights
@@ -77,12 +72,12 @@ def session_anomaly_chart():
         )
     )
 
-    # Add moving average line
+    # Add expected value line
     anomaly_fig.add_trace(
         go.Scatter(
             x=anomaly_df["session_date"],
-            y=anomaly_df["moving_avg"],
-            name="7-day Moving Avg",
+            y=anomaly_df["expected"],
+            name=f"Expected ({method}, {window}d)",
             mode="lines",
             marker=dict(color=COLORS["amber"]["500"]),
             line=dict(color=COLORS["amber"]["500"], dash="dash"),
@@ -98,3 +93,59 @@ def session_anomaly_chart():
     )
 
     st.plotly_chart(anomaly_fig, use_container_width=True)
+
+
+@st.fragment
+def segment_anomaly_chart(start, end, top_n=30):
+    dimension = st.radio(
+        "Split by",
+        list(DIMENSION_LABELS),
+        format_func=DIMENSION_LABELS.get,
+        horizontal=True,
+        key="segment_anomaly_dimension",
+    )
+    method, window, threshold = _detector_controls("segment_anomaly")
+
+    # Every series of the dimension is scored in one pass
+    matrix = daily_session_matrix(start, end, by=dimension)
+    detection = detect(matrix.to_numpy(), method, window)
+    flags = detection.flags(threshold)
+
+    # Heatmap of the busiest series; scores clipped so one spike keeps the scale
+    order = np.argsort(-matrix.sum().to_numpy(), kind="stable")[:top_n]
+    heatmap_fig = go.Figure(
+        go.Heatmap(
+            x=matrix.index,
+            y=matrix.columns[order].astype(str),
+            z=np.clip(detection.score[:, order].T, -5, 5),
+            zmid=0,
+            colorscale="RdBu_r",
+            colorbar=dict(title="Score (σ)"),
+            customdata=matrix.to_numpy()[:, order].T,
+            hovertemplate="%{y}<br>%{x|%Y-%m-%d}<br>Sessions: %{customdata}"
+            "<br>Score: %{z:.1f}<extra></extra>",
+        )
+    )
+    heatmap_fig.update_layout(
+        title_text=f"Anomaly Scores by {DIMENSION_LABELS[dimension]} "
+        f"(top {len(order)} of {matrix.shape[1]} by sessions)",
+        xaxis_title="Date",
+        height=250 + 18 * len(order),
+    )
+    st.plotly_chart(heatmap_fig, use_container_width=True)
+
+    day_idx, series_idx = np.nonzero(flags)
+    flagged = pd.DataFrame(
+        {
+            DIMENSION_LABELS[dimension]: matrix.columns[series_idx].astype(str),
+            "Date": matrix.index[day_idx].date,
+            "Sessions": detection.values[day_idx, series_idx],
+            "Expected": detection.expected[day_idx, series_idx].round(1),
+            "Score (σ)": detection.score[day_idx, series_idx].round(2),
+        }
+    ).sort_values("Score (σ)", key=np.abs, ascending=False)
+    st.caption(
+        f"{len(flagged):,} anomalous days across {matrix.shape[1]} series "
+        f"(|score| > {threshold}σ)."
+    )
+    st.dataframe(flagged, use_container_width=True, hide_index=True)
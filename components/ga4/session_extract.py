@@ -0,0 +1,85 @@
+from datetime import date
+
+import numpy as np
+import pandas as pd
+import streamlit as st
+
+from lib.memory_footprint import track_frame
+from lib.query_backend import run_query
+from lib.range_cache import DailyRangeCache
+
+from .utils import table_suffix
+
+EXTRACT_TTL = 86400  # the sample dataset is static
+
+# Low-cardinality strings are dictionary-encoded
+CATEGORICAL_COLUMNS = ["deviceCategory", "browser", "channelGrouping", "country"]
+# Session totals are small counts (or null), stored as nullable narrow ints
+COUNT_DTYPES = {
+    "visits": "Int8",
+    "bounces": "Int8",
+    "newVisits": "Int8",
+    "pageviews": "Int16",
+}
+
+
+def compact_sessions(df: pd.DataFrame) -> pd.DataFrame:
+    """Shrink a session frame: categories, visitor codes and narrow numerics."""
+    # fullVisitorId is only ever counted; a 64-bit hash is enough and stays
+    # consistent across shards loaded by separate queries
+    visitor_ids = df.pop("fullVisitorId").to_numpy(dtype=object)
+    df["visitor_code"] = pd.util.hash_array(visitor_ids).view(np.int64)
+    for col in CATEGORICAL_COLUMNS:
+        df[col] = df[col].astype("category")
+    for col in ("visitId", "visitStartTime"):
+        df[col] = pd.to_numeric(df[col], downcast="integer")
+    df = df.astype(COUNT_DTYPES)
+    df["timeOnSite"] = df["timeOnSite"].astype(np.float32)
+    return df
+
+
+def _fetch_sessions(start: date, end: date, ttl: int = EXTRACT_TTL) -> pd.DataFrame:
+    query = f"""
+    SELECT
+        PARSE_DATE('%Y%m%d', date) AS date,
+        fullVisitorId,
+        visitId,
+        visitStartTime,
+        device.deviceCategory AS deviceCategory,
+        device.browser AS browser,
+        channelGrouping,
+        geoNetwork.country AS country,
+        totals.visits,
+        totals.pageviews,
+        totals.timeOnSite,
+        totals.bounces,
+        totals.newVisits
+    FROM `bigquery-public-data.google_analytics_sample.ga_sessions_*`
+    WHERE _TABLE_SUFFIX BETWEEN '{table_suffix(start)}' AND '{table_suffix(end)}'
+    """
+    df = run_query(query, ttl=ttl)
+    df["date"] = pd.to_datetime(df["date"])
+    return compact_sessions(df)
+
+
+@st.cache_resource(ttl=EXTRACT_TTL)  # one set of daily shards per worker
+def _session_shards() -> DailyRangeCache:
+    return DailyRangeCache(_fetch_sessions, day_col="date")
+
+
+# ----------
+# Session Extract
+# ----------
+def get_session_extract(start: date, end: date) -> pd.DataFrame:
+    """One row per session in [start, end] with every column the GA4 charts use.
+
+    All session-level charts derive from this frame. Each daily
+    ga_sessions_YYYYMMDD shard is loaded once per worker, so widening the window
+    only scans the new shards. The frame is shared by all sessions and must not
+    be mutated.
+    """
+    shards = _session_shards()
+    with st.spinner("Loading GA4 sessions …"):
+        df = shards.get(start, end)
+    track_frame("GA4 sessions", shards.frame)
+    return df
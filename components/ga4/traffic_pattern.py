@@ -1,30 +1,28 @@
+import pandas as pd
 import plotly.express as px
 import streamlit as st
 
-from lib.bigquery_client import bigquery_client
+from .session_extract import get_session_extract
+from .utils import window_label
 
 
-@st.cache_data(ttl=86400)
-def traffic_by_weekday_and_hour():
-    # SQL to get session counts by weekday and hour
-    query = """
-    SELECT
-      FORMAT_TIMESTAMP('%A', TIMESTAMP_SECONDS(visitStartTime)) AS weekday,
-      EXTRACT(HOUR FROM TIMESTAMP_SECONDS(visitStartTime)) AS hour,
-      COUNT(*) AS sessions
-    FROM `bigquery-public-data.google_analytics_sample.ga_sessions_*`
-    WHERE _TABLE_SUFFIX BETWEEN '20170701' AND '20170731'
-    GROUP BY weekday, hour
-    ORDER BY weekday, hour
-    """
-    df = bigquery_client.query(query).to_dataframe()
-    return df
+def traffic_by_weekday_and_hour(start, end):
+    # Session counts by weekday and hour (UTC)
+    start_time = pd.to_datetime(
+        get_session_extract(start, end)["visitStartTime"], unit="s"
+    )
+    return (
+        pd.DataFrame({"weekday": start_time.dt.day_name(), "hour": start_time.dt.hour})
+        .groupby(["weekday", "hour"])
+        .size()
+        .reset_index(name="sessions")
+    )
 
 
 @st.fragment
-def traffic_pattern_chart():
+def traffic_pattern_chart(start, end):
     # Load traffic data
-    traffic_df = traffic_by_weekday_and_hour()
+    traffic_df = traffic_by_weekday_and_hour(start, end)
 
     # Pivot DataFrame to have weekdays as rows and hours as columns
     traffic_pivot = traffic_df.pivot(index="weekday", columns="hour", values="sessions")
@@ -48,7 +46,7 @@ def traffic_pattern_chart():
         x=traffic_pivot.columns,
         y=traffic_pivot.index,
         aspect="auto",
-        title="Sessions by Weekday and Hour (July 2017)",
+        title=f"Sessions by Weekday and Hour ({window_label(start, end)})",
     )
     # Increase figure height if needed
     heatmap_fig.update_layout(height=600, margin=dict(l=50, r=50, t=80, b=50))
@@ -1,43 +1,37 @@
-import pandas as pd
 import plotly.express as px
 import streamlit as st
 
-from lib.bigquery_client import bigquery_client
 from lib.tailwind_colors import COLORS
 
+from .daily_cube import unique_visitors, window_unique_visitors
+from .utils import window_label
+
+GRANULARITIES = {"Daily": "D", "Weekly": "W", "Monthly": "M"}
+
 
 # ----------
 # Unique Visitors
 # ----------
-@st.cache_data(ttl=86400)
-def unique_visitors_by_date():
-    # Initialize the BigQuery client
-    # Define SQL to get unique visits per day
-    query = """
-    SELECT
-      date AS session_date,
-      COUNT(DISTINCT visitId) AS unique_visitors
-    FROM `bigquery-public-data.google_analytics_sample.ga_sessions_*`
-    WHERE _TABLE_SUFFIX BETWEEN '20170701' AND '20170731'
-    GROUP BY session_date
-    ORDER BY session_date
-    """
-    df = bigquery_client.query(query).to_dataframe()
-    df["session_date"] = pd.to_datetime(df["session_date"], format="%Y%m%d")
-    return df
+def unique_visitors_by_date(start, end, freq="D"):
+    # Unique visitors per period, merged from cached per-day HLL sketches
+    return unique_visitors(start, end, freq)
 
 
 @st.fragment
-def unique_vistors_by_date_chart():
+def unique_vistors_by_date_chart(start, end):
+    granularity = st.radio(
+        "Granularity", list(GRANULARITIES), horizontal=True, key="uv_granularity"
+    )
+
     # Load unique visitors data
-    unique_visitors_df = unique_visitors_by_date()
+    unique_visitors_df = unique_visitors_by_date(start, end, GRANULARITIES[granularity])
 
-    # Area chart for unique visitors# Area chart for unique visitors
+    # Area chart for unique visitors
     unique_visitors_fig = px.area(
         unique_visitors_df,
         x="session_date",
         y="unique_visitors",
-        title="Daily Unique Visitors in July 2017",
+        title=f"{granularity} Unique Visitors ({window_label(start, end)})",
         labels={"session_date": "Date", "unique_visitors": "Unique Visitors"},
         color_discrete_sequence=[COLORS["blue"]["500"]],
     )
@@ -45,3 +39,7 @@ def unique_vistors_by_date_chart():
     unique_visitors_fig.update_layout(xaxis_title="Date", yaxis_title="Unique Visitors")
 
     st.plotly_chart(unique_visitors_fig, use_container_width=True)
+    st.caption(
+        f"Unique visitors in the whole window: {window_unique_visitors(start, end):,} "
+        "(HyperLogLog estimate, ~1.6% standard error)"
+    )
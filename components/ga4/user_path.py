@@ -2,46 +2,52 @@ import pandas as pd
 import plotly.graph_objects as go
 import streamlit as st
 
-from lib.bigquery_client import bigquery_client
+from lib.figure_cache import cached_figure
+
+from .hit_extract import MAX_DEPTH, get_hit_extract, transitions
 
 
 @st.cache_data(ttl=86400)
-def page_path_transitions(limit=50):
-    # English comments only inside code blocks
-    query = f"""
-    WITH hits AS (
-      SELECT
-        CONCAT(fullVisitorId, '-', CAST(visitId AS STRING)) AS session_id,
-        hits.hitNumber AS hit_num,
-        hits.page.pagePath AS page
-      FROM `bigquery-public-data.google_analytics_sample.ga_sessions_*`,
-           UNNEST(hits) AS hits
-      WHERE _TABLE_SUFFIX BETWEEN '20170701' AND '20170731'
-    ),
-    transitions AS (
-      SELECT
-        a.page AS source,
-        b.page AS target,
-        COUNT(*) AS value
-      FROM hits a
-      JOIN hits b
-        ON a.session_id = b.session_id
-       AND b.hit_num = a.hit_num + 1
-      GROUP BY source, target
-      ORDER BY value DESC
-      LIMIT {limit}
-    )
-    SELECT * FROM transitions;
+def page_path_transitions(start, end):
+    """Transition counts between consecutive hits, by step within the session.
+
+    Returns the page vocabulary and a frame of integer-encoded pairs
+    (source_id, target_id, step, value) indexing into it, so the Sankey
+    settings can be applied locally.
     """
-    df = bigquery_client.query(query).to_dataframe()
-    return df
+    extract = get_hit_extract(start, end)
+    return extract.pages, transitions(extract)
 
 
-@st.fragment
-def user_path_chart():
-    # Load transition data (top 50 transitions by default)
-    trans_df = page_path_transitions(limit=50)
+def top_transitions(pages, transitions, top_k=50, max_depth=MAX_DEPTH, page_filter=""):
+    """Top-k (source, target, value) transitions up to `max_depth` steps deep,
+    optionally keeping only pairs where either page contains `page_filter`."""
+    selected = transitions[transitions["step"] <= max_depth]
+    if page_filter:
+        matches = (
+            pd.Series(pages)
+            .str.contains(page_filter, case=False, regex=False)
+            .to_numpy()
+        )
+        selected = selected[
+            matches[selected["source_id"]] | matches[selected["target_id"]]
+        ]
+    pairs = (
+        selected.groupby(["source_id", "target_id"])["value"]
+        .sum()
+        .nlargest(top_k)
+        .reset_index()
+    )
+    return pd.DataFrame(
+        {
+            "source": pages[pairs["source_id"]],
+            "target": pages[pairs["target_id"]],
+            "value": pairs["value"],
+        }
+    )
+
 
+def _sankey_figure(trans_df, top_k):
     # Build node list and index map
     all_nodes = list(pd.unique(trans_df[["source", "target"]].values.ravel()))
     node_indices = {page: idx for idx, page in enumerate(all_nodes)}
@@ -64,7 +70,7 @@ def user_path_chart():
         )
     )
     sankey_fig.update_layout(
-        title_text="Top Page-to-Page Transitions (Sankey Diagram)",
+        title_text=f"Top {top_k} Page-to-Page Transitions (Sankey Diagram)",
         height=800,
         font=dict(
             size=12,
@@ -73,6 +79,32 @@ def user_path_chart():
         template="plotly_white",
         margin=dict(l=50, r=50, t=80, b=50),
     )
+    return sankey_fig
+
+
+@st.fragment
+def user_path_chart(start, end):
+    pages, transitions = page_path_transitions(start, end)
+
+    # Sankey settings are applied locally to the cached transitions
+    cols = st.columns(3)
+    top_k = cols[0].slider("Top transitions", 10, 200, 50, step=10)
+    max_depth = cols[1].slider(
+        "Max step in session",
+        1,
+        MAX_DEPTH,
+        MAX_DEPTH,
+        help=f"Step {MAX_DEPTH} includes every later step.",
+    )
+    page_filter = cols[2].text_input("Page contains", "")
+    trans_df = top_transitions(pages, transitions, top_k, max_depth, page_filter)
+
+    if trans_df.empty:
+        st.info("No transitions match the current filters.")
+        return
+
+    # Rebuilt only when the selected transitions change
+    sankey_fig = cached_figure(_sankey_figure, trans_df, top_k=top_k)
 
     # Display in Streamlit
     st.plotly_chart(sankey_fig, use_container_width=True)
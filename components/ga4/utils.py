@@ -0,0 +1,44 @@
+from datetime import date, timedelta
+from typing import Tuple
+
+import streamlit as st
+
+# Daily ga_sessions_YYYYMMDD shards available in the public sample dataset
+DATASET_START = date(2016, 8, 1)
+DATASET_END = date(2017, 8, 1)
+DEFAULT_WINDOW = (date(2017, 7, 1), date(2017, 7, 31))
+
+
+def table_suffix(d: date) -> str:
+    """Convert a date to the ga_sessions_* table suffix (YYYYMMDD)."""
+    return d.strftime("%Y%m%d")
+
+
+def window_label(start: date, end: date) -> str:
+    """Human readable label for chart titles, e.g. "July 2017"."""
+    same_month = (start.year, start.month) == (end.year, end.month)
+    if same_month and start.day == 1 and (end + timedelta(days=1)).day == 1:
+        return start.strftime("%B %Y")
+    return f"{start.isoformat()} – {end.isoformat()}"
+
+
+def get_date_window() -> Tuple[date, date]:
+    """Get the GA4 date window from the sidebar."""
+    with st.sidebar:
+        st.header("📅 Date Window")
+        start: date = st.date_input(
+            "Start",
+            DEFAULT_WINDOW[0],
+            min_value=DATASET_START,
+            max_value=DATASET_END,
+        )
+        end: date = st.date_input(
+            "End",
+            DEFAULT_WINDOW[1],
+            min_value=DATASET_START,
+            max_value=DATASET_END,
+        )
+        if end < start:
+            st.error("End date must be after start date.")
+            st.stop()
+    return start, end
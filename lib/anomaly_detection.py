@@ -0,0 +1,118 @@
+"""
+Vectorized anomaly detectors for many daily series at once.
+
+Every detector takes a (n_days, n_series) matrix — e.g. sessions per day and
+channel, pivoted from the GA4 daily cube — and scores all series in a single
+pass, so monitoring hundreds of series costs one local computation instead of
+one query per series.
+
+A detector returns a `Detection`: the expected value, the spread around it
+and a score `(value - expected) / spread`. Thresholds are applied afterwards
+with `Detection.flags`, so moving a threshold slider does not recompute the
+baselines.
+"""
+
+from dataclasses import dataclass
+from typing import Callable, Dict
+
+import numpy as np
+import pandas as pd
+from numpy.lib.stride_tricks import sliding_window_view
+
+MAD_TO_STD = 1.4826  # MAD of a normal distribution × 1.4826 ≈ σ
+# The series are counts: a flat week followed by a single extra session should
+# not score as infinitely anomalous
+MIN_SPREAD = 1.0
+
+
+@dataclass(frozen=True)
+class Detection:
+    values: np.ndarray  # (n_days, n_series)
+    expected: np.ndarray
+    spread: np.ndarray
+    score: np.ndarray  # 0 where there is no baseline yet
+
+    def flags(self, threshold: float) -> np.ndarray:
+        """+1 above expected + threshold·spread, -1 below, 0 otherwise."""
+        return np.where(
+            self.score > threshold, 1, np.where(self.score < -threshold, -1, 0)
+        ).astype(np.int8)
+
+
+def _detection(values: np.ndarray, expected: np.ndarray, spread: np.ndarray):
+    spread = np.fmax(spread, MIN_SPREAD)  # NaN (no baseline) stays NaN
+    score = np.nan_to_num((values - expected) / spread, nan=0.0)
+    return Detection(values, expected, spread, score)
+
+
+def _trailing_windows(values: np.ndarray, window: int) -> np.ndarray:
+    """(n_days, n_series, window) views of the `window` days before each day.
+
+    Windows reaching before the first day are NaN-padded.
+    """
+    padded = np.vstack([np.full((window, values.shape[1]), np.nan), values])
+    return sliding_window_view(padded[:-1], window, axis=0)
+
+
+# Rolling baselines exclude the scored day itself (a spike inside its own
+# window inflates the std and caps the reachable score at sqrt(window - 1)).
+# The first `window` days have no baseline and score 0.
+def rolling_zscore(values: np.ndarray, window: int = 7) -> Detection:
+    """Mean ± population std of the previous `window` days."""
+    rolling = pd.DataFrame(values).rolling(window)
+    expected = rolling.mean().shift(1).to_numpy()
+    spread = rolling.std(ddof=0).shift(1).to_numpy()
+    return _detection(values, expected, spread)
+
+
+def rolling_mad(values: np.ndarray, window: int = 7) -> Detection:
+    """Median ± scaled median absolute deviation of the previous `window` days.
+
+    Robust to earlier spikes inside the window.
+    """
+    windows = _trailing_windows(values.astype(np.float64), window)
+    expected = np.median(windows, axis=-1)  # NaN for incomplete windows
+    mad = np.median(np.abs(windows - expected[..., None]), axis=-1)
+    return _detection(values, expected, MAD_TO_STD * mad)
+
+
+def seasonal_residual(values: np.ndarray, window: int = 7, period: int = 7):
+    """Centered trend + mean weekly profile; residuals scored by their MAD.
+
+    Weekday effects (e.g. weekend dips) are part of the expectation instead of
+    being flagged. Windows shorter than two periods see each weekday at most
+    once, so the profile would absorb every deviation; they use the trend only.
+    """
+    values = values.astype(np.float64)
+    trend = (
+        pd.DataFrame(values)
+        .rolling(window, center=True, min_periods=1)
+        .mean()
+        .to_numpy()
+    )
+    expected = trend
+    if len(values) >= 2 * period:
+        detrended = values - trend
+        phase = np.arange(len(values)) % period
+        profile = np.stack([detrended[phase == p].mean(axis=0) for p in range(period)])
+        profile -= profile.mean(axis=0)
+        expected = trend + profile[phase]
+    residual = values - expected
+    mad = np.median(np.abs(residual - np.median(residual, axis=0)), axis=0)
+    spread = np.broadcast_to(MAD_TO_STD * mad, values.shape)
+    return _detection(values, expected, spread)
+
+
+DETECTORS: Dict[str, Callable[[np.ndarray, int], Detection]] = {
+    "Rolling z-score": rolling_zscore,
+    "Rolling median / MAD": rolling_mad,
+    "Seasonal residual": seasonal_residual,
+}
+
+
+def detect(values: np.ndarray, method: str, window: int) -> Detection:
+    """Run the detector named `method` (a key of DETECTORS) over a matrix."""
+    values = np.asarray(values)
+    if values.ndim == 1:
+        values = values[:, None]
+    return DETECTORS[method](values, window)
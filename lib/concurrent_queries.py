@@ -0,0 +1,48 @@
+"""
+Concurrent dispatch of independent page queries.
+
+A page declares its loaders up front and `run_concurrently` submits them to a
+shared thread pool, so the page waits for the slowest query instead of the sum
+of all round trips. Worker threads inherit the caller's ScriptRunContext so
+`st.cache_data` lookups work inside the loaders, but loaders must not render
+elements: concurrent writers would overwrite each other's delta path. Cached
+loaders therefore use `show_spinner=False`, and `run_concurrently` shows a
+single spinner from the script thread instead.
+"""
+
+import os
+import threading
+from concurrent.futures import ThreadPoolExecutor
+from typing import Callable, TypeVar
+
+import streamlit as st
+from streamlit.runtime.scriptrunner import add_script_run_ctx, get_script_run_ctx
+
+T = TypeVar("T")
+
+
+@st.cache_resource  # one pool per worker, shared by all sessions
+def _get_executor() -> ThreadPoolExecutor:
+    return ThreadPoolExecutor(
+        max_workers=int(os.getenv("QUERY_DISPATCH_WORKERS", "8")),
+        thread_name_prefix="query-dispatch",
+    )
+
+
+def run_concurrently(
+    tasks: dict[str, Callable[[], T]], spinner: str = "Running queries …"
+) -> dict[str, T]:
+    """Run independent loaders in parallel and return their results by name.
+
+    The first exception raised by a loader is re-raised in the caller.
+    """
+    ctx = get_script_run_ctx()
+
+    def call(fn: Callable[[], T]) -> T:
+        add_script_run_ctx(threading.current_thread(), ctx)
+        return fn()
+
+    executor = _get_executor()
+    with st.spinner(spinner):
+        futures = {name: executor.submit(call, fn) for name, fn in tasks.items()}
+        return {name: future.result() for name, future in futures.items()}
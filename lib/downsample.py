@@ -0,0 +1,125 @@
+"""
+Server-side downsampling of long time series before they are charted.
+
+A line chart cannot show more than a couple of points per horizontal pixel,
+yet every point is serialized into the websocket payload and drawn by the
+browser on each rerun. Downsampling to the chart's pixel width keeps the
+payload and render time flat as the date range grows:
+
+- ``lttb``: Largest-Triangle-Three-Buckets, one point per bucket chosen to
+  preserve the visual shape of the line.
+- ``minmax``: the minimum and maximum of each bucket, so every spike and dip
+  survives (two points per bucket).
+
+Series shorter than the budget are returned unchanged.
+"""
+
+from typing import List, Optional
+
+import numpy as np
+import pandas as pd
+import streamlit as st
+
+# Approximate plot widths in pixels (the server cannot measure the browser)
+FULL_WIDTH_PX = 1200
+HALF_WIDTH_PX = 600
+
+
+def _as_float(values) -> np.ndarray:
+    values = pd.Series(values)
+    if pd.api.types.is_datetime64_any_dtype(values):
+        values = values.astype("int64")
+    return values.to_numpy(dtype=np.float64, na_value=np.nan)
+
+
+def lttb(x, y, n_out: int) -> np.ndarray:
+    """Indices of the `n_out` points LTTB keeps (first and last included)."""
+    x, y = _as_float(x), np.nan_to_num(_as_float(y))
+    n = len(x)
+    if n_out >= n or n_out < 3:
+        return np.arange(n)
+    # n_out - 2 buckets between the fixed first and last points
+    edges = np.linspace(1, n - 1, n_out - 1).astype(np.int64)
+    selected = np.empty(n_out, dtype=np.int64)
+    selected[0], selected[-1] = 0, n - 1
+    a = 0
+    for i in range(n_out - 2):
+        lo, hi = edges[i], edges[i + 1]
+        next_hi = edges[i + 2] if i + 2 < len(edges) else n
+        avg_x, avg_y = x[hi:next_hi].mean(), y[hi:next_hi].mean()
+        # Twice the triangle area between the previous pick, each candidate
+        # and the next bucket's centroid
+        area = np.abs(
+            (x[a] - avg_x) * (y[lo:hi] - y[a]) - (x[a] - x[lo:hi]) * (avg_y - y[a])
+        )
+        a = lo + int(np.argmax(area))
+        selected[i + 1] = a
+    return selected
+
+
+def minmax(y, n_buckets: int) -> np.ndarray:
+    """Indices of at most `2 * n_buckets` points: the first and the last, plus
+    the min and max of each of `n_buckets - 1` equal-count buckets between them."""
+    y = _as_float(y)
+    n = len(y)
+    if 2 * n_buckets >= n or n_buckets < 2:
+        return np.arange(n)
+    inner = np.arange(1, n - 1)
+    bucket = (inner - 1) * (n_buckets - 1) // (n - 2)
+    # Within each bucket (sorted by value) the first is the min, the last the max
+    order = inner[np.lexsort((np.nan_to_num(y[inner]), bucket))]
+    bounds = np.searchsorted(bucket[order - 1], np.arange(n_buckets))
+    picks = np.concatenate([order[bounds[:-1]], order[bounds[1:] - 1], [0, n - 1]])
+    return np.unique(picks)
+
+
+def downsample(
+    df: pd.DataFrame,
+    x: str,
+    y: List[str],
+    width_px: int = FULL_WIDTH_PX,
+    method: str = "lttb",
+) -> pd.DataFrame:
+    """Rows of `df` (sorted by `x`) needed to draw the `y` columns at `width_px`.
+
+    Points kept for any of the `y` columns are kept for all of them, so the
+    series still share their x values. The `width_px` budget is split across
+    the columns, so at most `width_px` rows are returned however many series
+    share the chart (as long as each gets at least 4 points).
+    """
+    if len(df) <= width_px:
+        return df
+    df = df.sort_values(x)
+    per_series = max(width_px // len(y), 4)
+    if method == "lttb":
+        picks = [lttb(df[x], df[col], per_series) for col in y]
+    elif method == "minmax":
+        picks = [minmax(df[col], per_series // 2) for col in y]
+    else:
+        raise ValueError(f"Unknown downsampling method: {method}")
+    return df.iloc[np.unique(np.concatenate(picks))]
+
+
+def chart_points(
+    df: pd.DataFrame,
+    x: str,
+    y: List[str],
+    width_px: int = FULL_WIDTH_PX,
+    full_resolution: bool = False,
+    method: str = "lttb",
+) -> pd.DataFrame:
+    """`downsample` unless `full_resolution`, with a caption when points are dropped."""
+    if full_resolution:
+        return df
+    points = downsample(df, x, y, width_px, method)
+    if len(points) < len(df):
+        st.caption(f"Showing {len(points):,} of {len(df):,} points ({method}).")
+    return points
+
+
+def full_resolution_toggle(key: Optional[str] = None) -> bool:
+    return st.toggle(
+        "Full resolution",
+        key=key,
+        help="Send every point to the browser instead of a downsampled series.",
+    )
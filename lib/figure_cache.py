@@ -0,0 +1,47 @@
+"""
+Memoized Plotly figures keyed by a fingerprint of their input frames.
+
+Fragments rerun on every widget interaction and full-page reruns rebuild every
+chart, even when the cached frame underneath is unchanged. Building a Plotly
+Express figure (validation of every trace and layout property) dominates the
+cost of a chart — a choropleth takes ~250 ms to build and ~5 ms to serialize.
+
+`cached_figure(build, df, **params)` calls `build(df, **params)` once per
+distinct (builder, frame content, params) and shares the finished figure
+across sessions of the worker. Figures are shared: do not mutate them.
+"""
+
+import hashlib
+from typing import Callable
+
+import pandas as pd
+import plotly.graph_objects as go
+import streamlit as st
+
+FIGURE_CACHE_ENTRIES = 128
+
+
+def frame_fingerprint(*frames: pd.DataFrame) -> str:
+    """Content hash of one or more frames (values, index, columns and dtypes)."""
+    digest = hashlib.blake2b(digest_size=16)
+    for df in frames:
+        digest.update(repr(list(zip(df.columns, map(str, df.dtypes)))).encode())
+        digest.update(pd.util.hash_pandas_object(df, index=True).to_numpy().tobytes())
+    return digest.hexdigest()
+
+
+@st.cache_resource(max_entries=FIGURE_CACHE_ENTRIES, show_spinner=False)
+def _build_figure(key: str, params: tuple, _build, _frames) -> go.Figure:
+    # Keyed by `key` and `params` only; underscored arguments are not hashed
+    return _build(*_frames, **dict(params))
+
+
+def cached_figure(
+    build: Callable[..., go.Figure], *frames: pd.DataFrame, **params
+) -> go.Figure:
+    """`build(*frames, **params)`, reused while the frames' content is unchanged.
+
+    `params` must be hashable by Streamlit (strings, numbers, tuples, ...).
+    """
+    key = f"{build.__module__}.{build.__qualname__}:{frame_fingerprint(*frames)}"
+    return _build_figure(key, tuple(sorted(params.items())), build, frames)
@@ -0,0 +1,53 @@
+"""
+HyperLogLog distinct counts that merge across cube cells.
+
+Sketches are built in SQL: every row hashes its key to a 64-bit integer, the
+low `P` bits pick a register and the position of the lowest set bit of the
+next 52 bits gives the register value (rho). A group keeps the max rho per
+register and ships its non-empty registers packed as `reg * 64 + rho`, so a
+sketch is just an array of small integers. Any set of sketches (days, devices,
+...) merges by taking the per-register max, which makes distinct counts
+re-aggregatable after the fact with ~1.6% standard error at P=12.
+"""
+
+import numpy as np
+
+P = 12
+M = 1 << P
+_W_BITS = 52
+_W_MASK = (1 << _W_BITS) - 1
+
+
+def register_sql(hash_col: str) -> str:
+    """SQL expression for the register index of a 64-bit hash column."""
+    return f"({hash_col} & {M - 1})"
+
+
+def rho_sql(hash_col: str) -> str:
+    """SQL expression for the register value (1-based lowest set bit, capped)."""
+    w = f"(({hash_col} >> {P}) & {_W_MASK})"
+    return f"LEAST(BIT_COUNT(({w} & -{w}) - 1) + 1, {_W_BITS + 1})"
+
+
+def pack_sql(reg_col: str, rho_col: str) -> str:
+    """SQL expression packing a register index and value into one integer."""
+    return f"({reg_col} * 64 + {rho_col})"
+
+
+def merge(group_ids: np.ndarray, packed: np.ndarray, n_groups: int) -> np.ndarray:
+    """Merge packed register values into one dense register row per group."""
+    packed = np.asarray(packed, dtype=np.int64)
+    registers = np.zeros((n_groups, M), dtype=np.uint8)
+    np.maximum.at(registers, (group_ids, packed >> 6), (packed & 63).astype(np.uint8))
+    return registers
+
+
+def estimate(registers: np.ndarray) -> np.ndarray:
+    """Distinct-count estimate per register row (with small-range correction)."""
+    registers = np.atleast_2d(registers)
+    alpha = 0.7213 / (1 + 1.079 / M)
+    raw = alpha * M * M / np.exp2(-registers.astype(np.float64)).sum(axis=1)
+    zeros = (registers == 0).sum(axis=1)
+    small = (raw <= 2.5 * M) & (zeros > 0)
+    linear = M * np.log(M / np.maximum(zeros, 1))
+    return np.where(small, linear, raw)
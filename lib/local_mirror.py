@@ -0,0 +1,64 @@
+"""
+Download a local Parquet mirror of the public datasets for the DuckDB backend.
+
+Usage:
+    python -m lib.local_mirror --dest data --ga4-start 20170701 --ga4-end 20170731
+"""
+
+import argparse
+from pathlib import Path
+
+import pyarrow.parquet as pq
+
+from lib.bigquery_client import bigquery_client
+
+THELOOK_TABLES = [
+    "distribution_centers",
+    "events",
+    "inventory_items",
+    "order_items",
+    "orders",
+    "products",
+    "users",
+]
+GA4_DATASET = "bigquery-public-data.google_analytics_sample"
+
+
+def mirror_table(table_id: str, dest: Path):
+    """Copy a table with the (free) tabledata listing API into a Parquet file."""
+    if dest.exists():
+        print(f"skip {table_id} (exists)")
+        return
+    dest.parent.mkdir(parents=True, exist_ok=True)
+    table = bigquery_client.list_rows(table_id).to_arrow()
+    pq.write_table(table, dest)
+    print(f"wrote {dest} ({table.num_rows:,} rows)")
+
+
+def mirror_thelook(dest_dir: Path):
+    for table in THELOOK_TABLES:
+        mirror_table(
+            f"bigquery-public-data.thelook_ecommerce.{table}",
+            dest_dir / "thelook_ecommerce" / f"{table}.parquet",
+        )
+
+
+def mirror_ga_sessions(dest_dir: Path, start: str, end: str):
+    for table in bigquery_client.list_tables(GA4_DATASET):
+        suffix = table.table_id.removeprefix("ga_sessions_")
+        if start <= suffix <= end:
+            mirror_table(
+                f"{GA4_DATASET}.{table.table_id}",
+                dest_dir / "google_analytics_sample" / f"{table.table_id}.parquet",
+            )
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--dest", default="data")
+    parser.add_argument("--ga4-start", default="20170701")
+    parser.add_argument("--ga4-end", default="20170801")
+    args = parser.parse_args()
+
+    mirror_thelook(Path(args.dest))
+    mirror_ga_sessions(Path(args.dest), args.ga4_start, args.ga4_end)
@@ -0,0 +1,50 @@
+"""
+In-memory footprint of the DataFrames a worker keeps cached.
+
+Loaders call `track_frame` on the frame they hand to `st.cache_resource` /
+`st.cache_data`; `render_memory_footprint` lists the tracked frames in the
+sidebar so we can see how much a date window costs per worker.
+"""
+
+import threading
+
+import pandas as pd
+import streamlit as st
+
+_lock = threading.Lock()
+_frames: dict[str, tuple[int, int]] = {}  # name -> (rows, bytes)
+
+
+def frame_nbytes(df: pd.DataFrame) -> int:
+    """Deep memory usage of a frame, including string and category payloads."""
+    return int(df.memory_usage(index=True, deep=True).sum())
+
+
+def track_frame(name: str, df: pd.DataFrame) -> pd.DataFrame:
+    """Record the size of a cached frame under `name` and return it unchanged."""
+    with _lock:
+        _frames[name] = (len(df), frame_nbytes(df))
+    return df
+
+
+def memory_footprint() -> pd.DataFrame:
+    with _lock:
+        rows = [
+            {"frame": name, "rows": n_rows, "MB": n_bytes / 2**20}
+            for name, (n_rows, n_bytes) in sorted(_frames.items())
+        ]
+    return pd.DataFrame(rows, columns=["frame", "rows", "MB"])
+
+
+def render_memory_footprint():
+    footprint = memory_footprint()
+    with st.sidebar.expander("Memory footprint"):
+        if footprint.empty:
+            st.caption("No cached frames loaded yet.")
+            return
+        st.metric("Cached frames", f"{footprint['MB'].sum():,.1f} MB")
+        st.dataframe(
+            footprint,
+            hide_index=True,
+            column_config={"MB": st.column_config.NumberColumn(format="%.1f")},
+        )
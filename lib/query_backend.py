@@ -0,0 +1,353 @@
+"""
+Pluggable query backends for the dashboards.
+
+Every component runs its SQL through `run_query` / `run_query_arrow`.
+The backend is chosen with the QUERY_BACKEND environment variable:
+
+- ``bigquery`` (default): the live BigQuery project from `lib.bigquery_client`.
+- ``duckdb``: a local Parquet mirror of the public datasets under
+  LOCAL_DATA_DIR (see `lib.local_mirror`), queried with DuckDB.
+
+Queries are written in BigQuery Standard SQL; the DuckDB backend rewrites the
+handful of BigQuery-only constructs used in this repo before executing them.
+Results are shared across workers through the disk cache in `lib.result_cache`
+(QUERY_CACHE_DIR, QUERY_CACHE_MAX_MB, QUERY_CACHE_TTL).
+
+Backends also expose table metadata and row previews that do not run a query
+(BigQuery's tables.get / tabledata.list), for catalog-style pages.
+"""
+
+import os
+import re
+from abc import ABC, abstractmethod
+from dataclasses import dataclass
+from datetime import datetime, timezone
+from pathlib import Path
+from typing import Callable, List, Optional
+
+import duckdb
+import pandas as pd
+import pyarrow as pa
+import pyarrow.parquet as pq
+import streamlit as st
+from dotenv import load_dotenv
+
+from lib.result_cache import ResultCache, sql_fingerprint
+from lib.single_flight import SingleFlight
+
+load_dotenv()
+
+PUBLIC_PROJECT_ID = "bigquery-public-data"
+
+
+@dataclass(frozen=True)
+class TableMetadata:
+    table_id: str
+    last_modified: datetime
+    num_rows: int
+    num_bytes: int
+    schema: pd.DataFrame  # column (dotted for nested fields), type, mode
+
+
+def _bigquery_schema_rows(fields, prefix: str = "") -> List[dict]:
+    rows = []
+    for field in fields:
+        name = prefix + field.name
+        rows.append({"column": name, "type": field.field_type, "mode": field.mode})
+        rows += _bigquery_schema_rows(field.fields, prefix=f"{name}.")
+    return rows
+
+
+def _arrow_schema_rows(fields, prefix: str = "") -> List[dict]:
+    rows = []
+    for field in fields:
+        name, mode, dtype = prefix + field.name, "NULLABLE", field.type
+        if pa.types.is_list(dtype) or pa.types.is_large_list(dtype):
+            mode, dtype = "REPEATED", dtype.value_type
+        if pa.types.is_struct(dtype):
+            rows.append({"column": name, "type": "RECORD", "mode": mode})
+            rows += _arrow_schema_rows(list(dtype), prefix=f"{name}.")
+        else:
+            rows.append({"column": name, "type": str(dtype), "mode": mode})
+    return rows
+
+
+class QueryBackend(ABC):
+    """Executes BigQuery Standard SQL and returns the result as Arrow."""
+
+    name: str
+
+    @abstractmethod
+    def query_arrow(self, sql: str) -> pa.Table: ...
+
+    @abstractmethod
+    def table_metadata(self, table_id: str) -> TableMetadata:
+        """Size, schema and modification time of `project.dataset.table`."""
+
+    @abstractmethod
+    def preview_rows(self, table_id: str, max_rows: int) -> pa.Table:
+        """The first `max_rows` rows of a table, without running a query."""
+
+
+class BigQueryBackend(QueryBackend):
+    name = "bigquery"
+
+    def __init__(self):
+        # Imported lazily so the DuckDB backend works without BigQuery credentials
+        from lib.bigquery_client import bigquery_client
+
+        self.client = bigquery_client
+
+    def query_arrow(self, sql: str) -> pa.Table:
+        return self.client.query(sql).to_arrow()
+
+    def table_metadata(self, table_id: str) -> TableMetadata:
+        table = self.client.get_table(table_id)  # metadata only, no bytes billed
+        return TableMetadata(
+            table_id=table_id,
+            last_modified=table.modified,
+            num_rows=table.num_rows,
+            num_bytes=table.num_bytes,
+            schema=pd.DataFrame(_bigquery_schema_rows(table.schema)),
+        )
+
+    def preview_rows(self, table_id: str, max_rows: int) -> pa.Table:
+        # tabledata.list reads rows directly from storage and is free of charge
+        rows = self.client.list_rows(table_id, max_results=max_rows)
+        return rows.to_arrow(create_bqstorage_client=False)
+
+
+class DuckDBBackend(QueryBackend):
+    """DuckDB over a local Parquet mirror of the public datasets.
+
+    Expected layout (as written by `lib.local_mirror`)::
+
+        <data_dir>/thelook_ecommerce/<table>.parquet
+        <data_dir>/google_analytics_sample/ga_sessions_YYYYMMDD.parquet
+    """
+
+    name = "duckdb"
+
+    def __init__(self, data_dir: str):
+        self.data_dir = Path(data_dir)
+        if not self.data_dir.is_dir():
+            raise FileNotFoundError(
+                f"Local data directory not found: {self.data_dir}. "
+                "Create it with `python -m lib.local_mirror`."
+            )
+        self.conn = duckdb.connect()
+        self.conn.execute("SET TimeZone = 'UTC'")
+        self._register_views()
+
+    def _register_views(self):
+        for dataset_dir in sorted(p for p in self.data_dir.iterdir() if p.is_dir()):
+            dataset = dataset_dir.name
+            self.conn.execute(f'CREATE SCHEMA IF NOT EXISTS "{dataset}"')
+            shards = sorted(dataset_dir.glob("*_[0-9]*.parquet"))
+            for path in sorted(dataset_dir.glob("*.parquet")):
+                self._create_view(dataset, path.stem, f"'{path.as_posix()}'")
+            # Wildcard tables (e.g. ga_sessions_*) with a _TABLE_SUFFIX column
+            prefixes = {re.sub(r"_\d+$", "", p.stem) for p in shards}
+            for prefix in prefixes:
+                pattern = (dataset_dir / f"{prefix}_*.parquet").as_posix()
+                self.conn.execute(
+                    f"""
+                    CREATE OR REPLACE VIEW "{dataset}"."{prefix}" AS
+                    SELECT * EXCLUDE (filename),
+                           regexp_extract(filename, '{prefix}_(\\d+)\\.parquet', 1)
+                               AS _TABLE_SUFFIX
+                    FROM read_parquet('{pattern}', filename = true, union_by_name = true)
+                    """
+                )
+            # Tables mirrored as a directory of Parquet parts
+            for table_dir in sorted(p for p in dataset_dir.iterdir() if p.is_dir()):
+                pattern = (table_dir / "*.parquet").as_posix()
+                self._create_view(dataset, table_dir.name, f"'{pattern}'")
+
+    def _create_view(self, dataset: str, table: str, source: str):
+        self.conn.execute(
+            f'CREATE OR REPLACE VIEW "{dataset}"."{table}" AS '
+            f"SELECT * FROM read_parquet({source})"
+        )
+
+    def query_arrow(self, sql: str) -> pa.Table:
+        result = self.conn.cursor().execute(translate_to_duckdb(sql)).arrow()
+        # Newer DuckDB releases return a stream instead of a table
+        if isinstance(result, pa.RecordBatchReader):
+            result = result.read_all()
+        return _hugeint_to_int64(result)
+
+    def _table_files(self, table_id: str) -> List[Path]:
+        _, dataset, table = table_id.split(".")
+        path = self.data_dir / dataset / table
+        if path.is_dir():
+            return sorted(path.glob("*.parquet"))
+        if path.with_suffix(".parquet").exists():
+            return [path.with_suffix(".parquet")]
+        raise FileNotFoundError(f"Table not found in local mirror: {table_id}")
+
+    def table_metadata(self, table_id: str) -> TableMetadata:
+        files = self._table_files(table_id)
+        # Parquet footers carry everything needed; no data pages are read
+        footers = [pq.ParquetFile(path) for path in files]
+        stats = [path.stat() for path in files]
+        return TableMetadata(
+            table_id=table_id,
+            last_modified=datetime.fromtimestamp(
+                max(stat.st_mtime for stat in stats), tz=timezone.utc
+            ),
+            num_rows=sum(footer.metadata.num_rows for footer in footers),
+            num_bytes=sum(stat.st_size for stat in stats),
+            schema=pd.DataFrame(_arrow_schema_rows(footers[0].schema_arrow)),
+        )
+
+    def preview_rows(self, table_id: str, max_rows: int) -> pa.Table:
+        files = self._table_files(table_id)
+        # Reads only the first row group(s) of the first file
+        batches = pq.ParquetFile(files[0]).iter_batches(batch_size=max_rows)
+        return pa.Table.from_batches([next(batches)]).slice(0, max_rows)
+
+
+# ----------
+# BigQuery → DuckDB dialect translation
+# ----------
+def _hugeint_to_int64(table: pa.Table) -> pa.Table:
+    """Cast DECIMAL(38, 0) columns (DuckDB's HUGEINT, e.g. from SUM over
+    integers) to int64, which is what BigQuery returns for the same SQL."""
+    hugeint = pa.decimal128(38, 0)
+    schema = pa.schema(
+        field.with_type(pa.int64()) if field.type == hugeint else field
+        for field in table.schema
+    )
+    return table if schema.equals(table.schema) else table.cast(schema)
+
+
+def _split_call_args(sql: str, start: int) -> tuple[list[str], int]:
+    """Split the arguments of a call whose opening paren ends at `start`."""
+    args, depth, quote, current = [], 0, None, start
+    for i in range(start, len(sql)):
+        ch = sql[i]
+        if quote:
+            if ch == quote:
+                quote = None
+        elif ch in ("'", '"'):
+            quote = ch
+        elif ch == "(":
+            depth += 1
+        elif ch == ")":
+            if depth == 0:
+                args.append(sql[current:i].strip())
+                return args, i + 1
+            depth -= 1
+        elif ch == "," and depth == 0:
+            args.append(sql[current:i].strip())
+            current = i + 1
+    raise ValueError(f"Unbalanced parentheses in SQL near: {sql[start - 20 : start]}")
+
+
+def _rewrite_calls(sql: str, name: str, render: Callable[[list[str]], str]) -> str:
+    pattern = re.compile(rf"\b{name}\s*\(", re.IGNORECASE)
+    out, pos = [], 0
+    while match := pattern.search(sql, pos):
+        args, end = _split_call_args(sql, match.end())
+        args = [_rewrite_calls(arg, name, render) for arg in args]
+        out.append(sql[pos : match.start()])
+        out.append(render(args))
+        pos = end
+    out.append(sql[pos:])
+    return "".join(out)
+
+
+_FUNCTION_RULES: dict[str, Callable[[list[str]], str]] = {
+    "DATE_DIFF": lambda a: f"date_diff('{a[2].lower()}', {a[1]}, {a[0]})",
+    # TIMESTAMP_DIFF counts whole elapsed units, like DuckDB's date_sub
+    "TIMESTAMP_DIFF": lambda a: f"date_sub('{a[2].lower()}', {a[1]}, {a[0]})",
+    "PARSE_DATE": lambda a: f"CAST(strptime({a[1]}, {a[0]}) AS DATE)",
+    "FORMAT_DATE": lambda a: f"strftime({a[1]}, {a[0]})",
+    "FORMAT_TIMESTAMP": lambda a: f"strftime({a[1]}, {a[0]})",
+    "TIMESTAMP_SECONDS": lambda a: f"to_timestamp({a[0]})",
+    "TIMESTAMP": lambda a: f"CAST({a[0]} AS TIMESTAMP)",
+    # Different hash than BigQuery, but any well-mixed 64-bit hash works for
+    # the HLL sketches in lib.hll (DuckDB's hash() is unsigned, so keep 63 bits)
+    "FARM_FINGERPRINT": lambda a: f"CAST(hash({a[0]}) >> 1 AS BIGINT)",
+}
+
+_TABLE_REF = re.compile(rf"`{PUBLIC_PROJECT_ID}\.(\w+)\.([\w*]+)`")
+_UNNEST_ALIAS = re.compile(r"UNNEST\(([^()]*)\)\s+AS\s+(\w+)", re.IGNORECASE)
+
+
+def translate_to_duckdb(sql: str) -> str:
+    """Rewrite the BigQuery-specific SQL used in this repo for DuckDB."""
+    sql = _TABLE_REF.sub(
+        lambda m: f'"{m.group(1)}"."{m.group(2).rstrip("*").rstrip("_")}"', sql
+    )
+    # DuckDB needs a column alias to address the unnested struct
+    sql = _UNNEST_ALIAS.sub(r"UNNEST(\1) AS _\2(\2)", sql)
+    for name, render in _FUNCTION_RULES.items():
+        sql = _rewrite_calls(sql, name, render)
+    return sql
+
+
+@st.cache_resource  # one backend (and connection pool) per worker
+def get_query_backend() -> QueryBackend:
+    backend = os.getenv("QUERY_BACKEND", "bigquery").lower()
+    if backend == "bigquery":
+        return BigQueryBackend()
+    if backend == "duckdb":
+        return DuckDBBackend(os.getenv("LOCAL_DATA_DIR", "data"))
+    raise ValueError(f"Unknown QUERY_BACKEND: {backend}")
+
+
+@st.cache_resource
+def get_result_cache() -> Optional[ResultCache]:
+    max_mb = int(os.getenv("QUERY_CACHE_MAX_MB", "1024"))
+    if max_mb <= 0:
+        return None
+    return ResultCache(
+        directory=os.getenv("QUERY_CACHE_DIR", ".cache/query_results"),
+        max_bytes=max_mb * 1024 * 1024,
+        default_ttl=int(os.getenv("QUERY_CACHE_TTL", "3600")),
+    )
+
+
+@st.cache_resource
+def get_single_flight() -> SingleFlight:
+    return SingleFlight()
+
+
+def run_query_arrow(sql: str, ttl: Optional[int] = None) -> pa.Table:
+    """Run SQL on the configured backend and return an Arrow table.
+
+    Results are served from the node-wide disk cache when a fresh entry exists;
+    `ttl` (seconds) overrides QUERY_CACHE_TTL for this query. Concurrent
+    callers of the same query share a single backend job.
+    """
+    backend = get_query_backend()
+    cache = get_result_cache()
+    key = sql_fingerprint(sql, namespace=backend.name)
+    if cache is not None and (table := cache.get(key)) is not None:
+        return table
+
+    def execute() -> pa.Table:
+        table = backend.query_arrow(sql)
+        if cache is not None:
+            cache.put(key, table, ttl)
+        return table
+
+    return get_single_flight().do(key, execute)
+
+
+# Same dtypes as BigQuery's `to_dataframe()`: INT64 / BOOL stay nullable
+# instead of falling back to float64 / object when a column contains NULLs
+_PANDAS_TYPES = {pa.int64(): pd.Int64Dtype(), pa.bool_(): pd.BooleanDtype()}
+
+
+def arrow_to_pandas(table: pa.Table) -> pd.DataFrame:
+    """Convert a query result like `to_dataframe()` did, with DATE columns as
+    datetime64 rather than `datetime.date` objects."""
+    return table.to_pandas(date_as_object=False, types_mapper=_PANDAS_TYPES.get)
+
+
+def run_query(sql: str, ttl: Optional[int] = None) -> pd.DataFrame:
+    """Run SQL on the configured backend and return a DataFrame."""
+    return arrow_to_pandas(run_query_arrow(sql, ttl))
@@ -0,0 +1,154 @@
+"""
+Range-aware cache of day-partitioned query results.
+
+`st.cache_data` keys on the exact `(start, end)` arguments, so sliding a date
+range by one day re-runs the whole query. `DailyRangeCache` instead keeps one
+partition per calendar day: a request only fetches the days it has not seen
+yet (one query per contiguous run of missing days) and merges them into the
+frame it already holds.
+
+Recent days may still receive new rows, so days within `volatile_days` of
+today are re-fetched once they are older than `volatile_ttl` seconds. Runs are
+split at the start of that window and the volatile part is fetched with
+`ttl=volatile_ttl`, so the query layer's result cache cannot hand back a
+result older than the refresh interval.
+"""
+
+import threading
+import time
+from datetime import date, timedelta
+from typing import Callable, Iterator, Optional
+
+import pandas as pd
+from pandas.api.types import union_categoricals
+
+from lib.single_flight import SingleFlight
+
+
+def slice_days(
+    df: pd.DataFrame, start: date, end: date, day_col: str = "day"
+) -> pd.DataFrame:
+    """Rows of a day-sorted frame with start <= day <= end (inclusive)."""
+    lo = df[day_col].searchsorted(pd.Timestamp(start), side="left")
+    hi = df[day_col].searchsorted(pd.Timestamp(end), side="right")
+    return df.iloc[lo:hi]
+
+
+def _concat(frames: list[pd.DataFrame]) -> pd.DataFrame:
+    """Concatenate frames, keeping categorical columns categorical."""
+    for col in frames[-1].columns:
+        if isinstance(frames[-1][col].dtype, pd.CategoricalDtype):
+            categories = union_categoricals([f[col] for f in frames]).categories
+            frames = [
+                f.assign(**{col: f[col].cat.set_categories(categories)}) for f in frames
+            ]
+    return pd.concat(frames, ignore_index=True)
+
+
+def contiguous_runs(days: list[date]) -> Iterator[tuple[date, date]]:
+    """Group sorted days into contiguous (first, last) runs."""
+    first = prev = days[0]
+    for day in days[1:]:
+        if day - prev > timedelta(days=1):
+            yield first, prev
+            first = day
+        prev = day
+    yield first, prev
+
+
+class DailyRangeCache:
+    """Per-day partitions of `fetch(start, end)`, filled in incrementally.
+
+    `fetch` must return every row whose `day_col` falls in [start, end]
+    (inclusive); days without rows are remembered as empty partitions. It must
+    also accept an optional `ttl` keyword (seconds) to pass on to `run_query`;
+    it is set for volatile days to cap how long a cached result is reused.
+    Returned frames are slices of shared state and must not be mutated.
+    """
+
+    def __init__(
+        self,
+        fetch: Callable[[date, date], pd.DataFrame],
+        day_col: str = "day",
+        volatile_days: int = 2,
+        volatile_ttl: int = 600,
+    ):
+        self.fetch = fetch
+        self.day_col = day_col
+        self.volatile_days = volatile_days
+        self.volatile_ttl = volatile_ttl
+        self._lock = threading.Lock()
+        self._flight = SingleFlight()
+        self._fetched_at: dict[date, float] = {}
+        self._frame: Optional[pd.DataFrame] = None
+
+    @property
+    def frame(self) -> pd.DataFrame:
+        """Every row loaded so far (e.g. for memory accounting)."""
+        return self._frame if self._frame is not None else pd.DataFrame()
+
+    def _volatile_from(self) -> date:
+        return date.today() - timedelta(days=self.volatile_days)
+
+    def _missing_days(self, start: date, end: date) -> list[date]:
+        now = time.time()
+        volatile_from = self._volatile_from()
+        missing = []
+        for i in range((end - start).days + 1):
+            day = start + timedelta(days=i)
+            fetched_at = self._fetched_at.get(day)
+            if fetched_at is None or (
+                day >= volatile_from and now - fetched_at > self.volatile_ttl
+            ):
+                missing.append(day)
+        return missing
+
+    def _merge(self, first: date, last: date, part: pd.DataFrame):
+        part = part.copy()
+        part[self.day_col] = pd.to_datetime(part[self.day_col])
+        if self._frame is None:
+            frame = part
+        else:
+            days = self._frame[self.day_col]
+            stale = (days >= pd.Timestamp(first)) & (days <= pd.Timestamp(last))
+            frame = _concat([self._frame[~stale], part])
+        self._frame = frame.sort_values(self.day_col, kind="stable", ignore_index=True)
+
+    def _missing_runs(self, start: date, end: date) -> list[tuple[date, date, dict]]:
+        """(first, last, fetch kwargs) for each run of days that needs a query."""
+        missing = self._missing_days(start, end)
+        if not missing:
+            return []
+        volatile_from = self._volatile_from()
+        runs = []
+        for first, last in contiguous_runs(missing):
+            if first < volatile_from:
+                runs.append((first, min(last, volatile_from - timedelta(days=1)), {}))
+            if last >= volatile_from:
+                runs.append(
+                    (max(first, volatile_from), last, {"ttl": self.volatile_ttl})
+                )
+        return runs
+
+    def _fetch_run(self, first: date, last: date, **fetch_kwargs) -> pd.DataFrame:
+        key = f"{first}:{last}:{fetch_kwargs.get('ttl')}"
+        return self._flight.do(key, lambda: self.fetch(first, last, **fetch_kwargs))
+
+    def get(self, start: date, end: date) -> pd.DataFrame:
+        """Rows for start <= day <= end, querying only the uncached days.
+
+        The lock only guards the bookkeeping; fetches run outside it, so
+        callers for other ranges are not queued behind a slow query, and
+        concurrent callers missing the same run share one fetch.
+        """
+        with self._lock:
+            runs = self._missing_runs(start, end)
+        for first, last, fetch_kwargs in runs:
+            part = self._fetch_run(first, last, **fetch_kwargs)
+            with self._lock:
+                self._merge(first, last, part)
+                now = time.time()
+                for i in range((last - first).days + 1):
+                    self._fetched_at[first + timedelta(days=i)] = now
+        with self._lock:
+            return slice_days(self._frame, start, end, self.day_col)
@@ -0,0 +1,109 @@
+"""
+Disk-backed query result cache shared by every Streamlit worker on a node.
+
+Results are stored as Arrow IPC files named after a fingerprint of the
+normalized SQL. Each file carries its expiry time in the schema metadata, file
+modification times track recency for LRU eviction, and writes are atomic
+(temp file + rename) so concurrent workers never read a partial result.
+"""
+
+import contextlib
+import hashlib
+import os
+import re
+import time
+import uuid
+from pathlib import Path
+from typing import Optional
+
+import pyarrow as pa
+
+_EXPIRES_AT = b"result_cache.expires_at"
+_STRING_OR_SPACE = re.compile(
+    r"('(?:[^'\\]|\\.)*'|\"(?:[^\"\\]|\\.)*\")|(?:\s|--[^\n]*)+"
+)
+
+
+def normalize_sql(sql: str) -> str:
+    """Strip comments, collapse whitespace and drop the trailing semicolon."""
+
+    def _sub(m: re.Match) -> str:
+        return m.group(1) if m.group(1) else " "
+
+    return _STRING_OR_SPACE.sub(_sub, sql).strip().rstrip(";").strip()
+
+
+def sql_fingerprint(sql: str, namespace: str = "") -> str:
+    """Stable key for a query; `namespace` separates e.g. different backends."""
+    payload = f"{namespace}\n{normalize_sql(sql)}".encode("utf-8")
+    return hashlib.sha256(payload).hexdigest()
+
+
+class ResultCache:
+    """Arrow IPC result files with per-entry TTL and an LRU size budget."""
+
+    def __init__(self, directory: str, max_bytes: int, default_ttl: int):
+        self.directory = Path(directory)
+        self.directory.mkdir(parents=True, exist_ok=True)
+        self.max_bytes = max_bytes
+        self.default_ttl = default_ttl
+
+    def _path(self, key: str) -> Path:
+        return self.directory / f"{key}.arrow"
+
+    def get(self, key: str) -> Optional[pa.Table]:
+        path = self._path(key)
+        try:
+            with pa.OSFile(str(path), "rb") as source:
+                reader = pa.ipc.open_file(source)
+                expires_at = float((reader.schema.metadata or {}).get(_EXPIRES_AT, 0))
+                if expires_at < time.time():
+                    path.unlink(missing_ok=True)
+                    return None
+                table = reader.read_all()
+        except (FileNotFoundError, pa.ArrowInvalid):
+            return None
+
+        # Touch the file so LRU eviction sees it as recently used; another
+        # worker may have evicted it since the read, which is still a hit
+        with contextlib.suppress(FileNotFoundError):
+            os.utime(path)
+        return table
+
+    def put(self, key: str, table: pa.Table, ttl: Optional[int] = None):
+        """Store `table` under `key`; results larger than `max_bytes` on disk
+        are not cached."""
+        expires_at = time.time() + (self.default_ttl if ttl is None else ttl)
+        metadata = {**(table.schema.metadata or {}), _EXPIRES_AT: str(expires_at)}
+        table = table.replace_schema_metadata(metadata)
+
+        tmp_path = self.directory / f".{key}.{uuid.uuid4().hex}.tmp"
+        with pa.OSFile(str(tmp_path), "wb") as sink:
+            with pa.ipc.new_file(
+                sink, table.schema, options=pa.ipc.IpcWriteOptions(compression="lz4")
+            ) as writer:
+                writer.write_table(table)
+        # A result over the whole budget would evict every other entry and
+        # then itself; leave the cache as it is instead
+        if tmp_path.stat().st_size > self.max_bytes:
+            tmp_path.unlink(missing_ok=True)
+            return
+        os.replace(tmp_path, self._path(key))
+        self.evict()
+
+    def evict(self):
+        """Delete least-recently-used entries until the cache fits its budget."""
+        entries = []
+        for path in self.directory.glob("*.arrow"):
+            try:
+                stat = path.stat()
+            except FileNotFoundError:  # removed by another worker
+                continue
+            entries.append((stat.st_mtime, stat.st_size, path))
+
+        total = sum(size for _, size, _ in entries)
+        for _, size, path in sorted(entries):
+            if total <= self.max_bytes:
+                break
+            path.unlink(missing_ok=True)
+            total -= size
@@ -0,0 +1,56 @@
+"""
+Vectorized great-circle helpers for assigning points to their nearest center.
+
+Points are mapped to unit vectors on the sphere, where the great-circle
+distance is a monotonic function of the dot product. Finding the nearest of
+`k` centers for `n` points is therefore one (n × 3) @ (3 × k) matrix product
+and an argmax, processed in chunks to bound memory. With a handful of centers
+(the distribution centers) this beats a tree index, whose build and query
+overhead only pays off for thousands of centers.
+"""
+
+from typing import Tuple
+
+import numpy as np
+
+EARTH_RADIUS_KM = 6371.0088
+CHUNK_ROWS = 1_000_000
+
+
+def unit_vectors(lat, lon) -> np.ndarray:
+    """(n, 3) unit vectors for latitudes/longitudes in degrees."""
+    lat = np.radians(np.asarray(lat, dtype=np.float64))
+    lon = np.radians(np.asarray(lon, dtype=np.float64))
+    cos_lat = np.cos(lat)
+    return np.column_stack([cos_lat * np.cos(lon), cos_lat * np.sin(lon), np.sin(lat)])
+
+
+def haversine_km(lat1, lon1, lat2, lon2) -> np.ndarray:
+    """Great-circle distance in km (element-wise, broadcasting)."""
+    lat1, lon1, lat2, lon2 = map(np.radians, (lat1, lon1, lat2, lon2))
+    a = (
+        np.sin((lat2 - lat1) / 2) ** 2
+        + np.cos(lat1) * np.cos(lat2) * np.sin((lon2 - lon1) / 2) ** 2
+    )
+    return 2 * EARTH_RADIUS_KM * np.arcsin(np.sqrt(np.clip(a, 0, 1)))
+
+
+def nearest_center(lat, lon, center_lat, center_lon) -> Tuple[np.ndarray, np.ndarray]:
+    """Index of the nearest center for each point and the distance to it (km)."""
+    center_lat = np.asarray(center_lat, dtype=np.float64)
+    center_lon = np.asarray(center_lon, dtype=np.float64)
+    centers = unit_vectors(center_lat, center_lon).T  # (3, k)
+    lat = np.asarray(lat, dtype=np.float64)
+    lon = np.asarray(lon, dtype=np.float64)
+    nearest = np.empty(len(lat), dtype=np.int32)
+    distance = np.empty(len(lat), dtype=np.float64)
+    for lo in range(0, len(lat), CHUNK_ROWS):
+        chunk = slice(lo, lo + CHUNK_ROWS)
+        similarity = unit_vectors(lat[chunk], lon[chunk]) @ centers  # cos(angle)
+        nearest[chunk] = np.argmax(similarity, axis=1)
+        # arccos of the similarity is imprecise for nearby points; use haversine
+        idx = nearest[chunk]
+        distance[chunk] = haversine_km(
+            lat[chunk], lon[chunk], center_lat[idx], center_lon[idx]
+        )
+    return nearest, distance
@@ -6,16 +6,22 @@ from components.ga4.countries import country_analysis_fragment
 from components.ga4.data_catalog import data_catalog
 from components.ga4.device_and_browser import browser_chart, device_chart
 from components.ga4.eda_pygwalker import eda_pygwalker
+from components.ga4.funnel import funnel_chart
 from components.ga4.landing_page_performance import landing_page_performance_chart
 from components.ga4.new_vs_returning import (
     metrics_comparison_chart,
     new_vs_returning_chart,
 )
 from components.ga4.session_and_pv_by_date import session_and_pv_by_date_chart
-from components.ga4.session_anomaly import session_anomaly_chart
+from components.ga4.session_anomaly import (
+    segment_anomaly_chart,
+    session_anomaly_chart,
+)
 from components.ga4.traffic_pattern import traffic_pattern_chart
 from components.ga4.unique_visitors_by_date import unique_vistors_by_date_chart
 from components.ga4.user_path import user_path_chart
+from components.ga4.utils import get_date_window
+from lib.memory_footprint import render_memory_footprint
 
 # st.set_page_config(page_title="Google Analytics Dashboard", layout="wide")
 
@@ -28,72 +34,82 @@ def page_data_catalog():
 
 # Basic Analysis Page
 def page_basic_analysis():
+    start, end = get_date_window()
     st.title("Basic Analysis")
-    basic_metrics()
+    basic_metrics(start, end)
     st.write("---")
     cols1 = st.columns(2)
     with cols1[0]:
         st.subheader("Unique Visitors by Date")
-        unique_vistors_by_date_chart()
+        unique_vistors_by_date_chart(start, end)
     with cols1[1]:
         st.subheader("Session and Pageviews by Date")
-        session_and_pv_by_date_chart()
+        session_and_pv_by_date_chart(start, end)
     st.write("---")
     cols2 = st.columns(2)
     with cols2[0]:
         st.subheader("Device Distribution")
-        device_chart()
+        device_chart(start, end)
     with cols2[1]:
         st.subheader("Browser Distribution")
-        browser_chart()
+        browser_chart(start, end)
+    st.write("---")
+    st.subheader("Daily sessions with anomaly detection")
+    session_anomaly_chart(start, end)
     st.write("---")
-    st.subheader("Daily sessions with 7-day avg")
-    session_anomaly_chart()
+    st.subheader("Anomalies by segment")
+    segment_anomaly_chart(start, end)
 
 
 # User Behavior Analysis Page
 def page_user_behavior():
+    start, end = get_date_window()
     st.title("User Behavior Analysis")
     cols1 = st.columns(2)
     with cols1[0]:
         st.subheader("New vs Returning Users")
-        new_vs_returning_chart()
+        new_vs_returning_chart(start, end)
     with cols1[1]:
         st.subheader("Metrics Comparison: New vs Returning Users")
-        metrics_comparison_chart()
+        metrics_comparison_chart(start, end)
     st.write("---")
     st.subheader("Channel Metrics Comparison")
     st.markdown(
         "This chart compares average metrics across different channels, including pageviews, session duration, and bounce rate."
     )
-    channel_metrics_comparison_chart()
+    channel_metrics_comparison_chart(start, end)
     st.write("---")
-    st.subheader("Top Landing Pages: Sessions and Bounce Rate")
-    landing_page_performance_chart()
+    st.subheader("Top Landing & Exit Pages")
+    landing_page_performance_chart(start, end)
     st.write("---")
     st.subheader("User Path Transitions")
-    user_path_chart()
+    user_path_chart(start, end)
+    st.write("---")
+    st.subheader("Session Funnel")
+    funnel_chart(start, end)
     st.write("---")
     st.subheader("Traffic Pattern by Weekday and Hour")
-    traffic_pattern_chart()
+    traffic_pattern_chart(start, end)
 
 
 # Country Analysis Page
 def page_country_analysis():
+    start, end = get_date_window()
     st.title("Country Analysis")
     st.markdown(
         "This section provides insights into user behavior by country, including total sessions, average pageviews, session duration, and bounce rate."
     )
-    country_analysis_fragment()
+    country_analysis_fragment(start, end)
 
 
 # EDA PyGWalker
 def page_eda_pygwalker():
+    start, end = get_date_window()
     st.title("EDA with PyGWalker")
     st.markdown(
         "This section allows you to explore the dataset interactively using PyGWalker."
     )
-    eda_pygwalker()
+    eda_pygwalker(start, end)
 
 
 # Pages setup
@@ -110,3 +126,6 @@ st.sidebar.markdown("---")
 
 # Render selected page
 PAGES[selection]()
+
+# Size of the frames cached by this worker (after the page has loaded them)
+render_memory_footprint()
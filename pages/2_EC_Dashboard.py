@@ -1,7 +1,6 @@
 import streamlit as st
 
 from components.ec.category_brand import category_brand_analysis
-from components.ec.data_agent_chat import data_agent_chat
 from components.ec.demographics import customer_demographics
 from components.ec.executive_overview import executive_overview
 from components.ec.geo_logistics import geo_logistics
@@ -9,6 +8,15 @@ from components.ec.inventory_supply import inventory_supply_chain
 from components.ec.product_merchandising import product_merchandising
 from components.ec.sales_trends import daily_sales_trend
 
+
+def data_agent_chat():
+    # Imported lazily: the agent always talks to BigQuery, so the other pages
+    # keep working on the local DuckDB backend without credentials.
+    from components.ec.data_agent_chat import data_agent_chat
+
+    data_agent_chat()
+
+
 PAGES = {
     "Executive Overview": executive_overview,
     "Geo & Logistics": geo_logistics,
@@ -0,0 +1,52 @@
+import numpy as np
+import pytest
+
+from lib.anomaly_detection import DETECTORS, detect, seasonal_residual
+
+SPIKE_DAY = 20
+
+
+def noisy_series(n_days: int = 35, n_series: int = 3) -> np.ndarray:
+    rng = np.random.default_rng(0)
+    return 100 + rng.normal(0, 3, size=(n_days, n_series)).round()
+
+
+@pytest.mark.parametrize("method", list(DETECTORS))
+def test_detector_flags_an_injected_spike(method):
+    values = noisy_series()
+    values[SPIKE_DAY, 1] += 60
+
+    detection = detect(values, method, window=7)
+
+    assert detection.flags(3.0)[SPIKE_DAY, 1] == 1
+    assert np.argmax(detection.score[:, 1]) == SPIKE_DAY
+    # Series without a spike stay far below the spike's score
+    assert np.abs(detection.score[:, [0, 2]]).max() < detection.score[SPIKE_DAY, 1] / 3
+
+
+@pytest.mark.parametrize("method", list(DETECTORS))
+def test_detector_flags_a_drop(method):
+    values = noisy_series()
+    values[SPIKE_DAY, 0] -= 60
+
+    assert detect(values, method, window=7).flags(3.0)[SPIKE_DAY, 0] == -1
+
+
+def test_seasonal_profile_is_not_flagged():
+    weekly = np.tile([100, 100, 100, 100, 100, 40, 40], 5).astype(float)
+    values = (weekly + noisy_series(35, 1)[:, 0] - 100)[:, None]
+
+    # The centered trend is truncated at both ends, so only inner days count
+    assert not seasonal_residual(values).flags(3.0)[7:-7].any()
+
+
+@pytest.mark.parametrize("n_days", [3, 6, 13])
+def test_seasonal_residual_on_short_windows(n_days):
+    values = noisy_series(n_days, 2)
+    values[n_days // 2, 0] += 60
+
+    detection = seasonal_residual(values)
+
+    assert np.isfinite(detection.expected).all()
+    assert np.isfinite(detection.spread).all()
+    assert detection.flags(3.0)[n_days // 2, 0] == 1
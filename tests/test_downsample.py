@@ -0,0 +1,61 @@
+import numpy as np
+import pandas as pd
+import pytest
+
+from lib.downsample import downsample, lttb, minmax
+
+N = 5_000
+SPIKE = 3_217
+
+
+def series_with_spike():
+    rng = np.random.default_rng(0)
+    y = np.sin(np.arange(N) / 200) + rng.normal(0, 0.05, N)
+    y[SPIKE] = 10.0
+    return np.arange(N), y
+
+
+@pytest.mark.parametrize("threshold", [3, 100, 1_000])
+def test_lttb_keeps_the_ends_and_the_spike(threshold):
+    x, y = series_with_spike()
+    picks = lttb(x, y, threshold)
+
+    assert len(picks) <= threshold
+    assert picks[0] == 0 and picks[-1] == N - 1
+    assert np.all(np.diff(picks) > 0)
+    if threshold > 3:
+        assert SPIKE in picks
+
+
+@pytest.mark.parametrize("threshold", [4, 100, 1_000])
+def test_minmax_keeps_the_ends_and_the_spike(threshold):
+    _, y = series_with_spike()
+    y[100] = -10.0  # a dip as well
+    picks = minmax(y, threshold // 2)
+
+    assert len(picks) <= threshold
+    assert picks[0] == 0 and picks[-1] == N - 1
+    assert SPIKE in picks and 100 in picks
+
+
+def test_short_series_are_unchanged():
+    x, y = np.arange(50), np.arange(50.0)
+    np.testing.assert_array_equal(lttb(x, y, 100), x)
+    np.testing.assert_array_equal(minmax(y, 50), x)
+
+
+@pytest.mark.parametrize("n_series", [1, 2, 5])
+@pytest.mark.parametrize("method", ["lttb", "minmax"])
+def test_downsample_frame_stays_within_the_width(method, n_series):
+    _, y = series_with_spike()
+    columns = [f"y{i}" for i in range(n_series)]
+    df = pd.DataFrame(
+        {"day": pd.date_range("2020-01-01", periods=N)}
+        | {col: np.roll(y, 500 * i) for i, col in enumerate(columns)}
+    )
+    points = downsample(df, "day", columns, width_px=200, method=method)
+
+    # The budget is shared by all columns, so the payload does not grow with them
+    assert len(points) <= 200
+    assert points["day"].is_monotonic_increasing
+    assert all(points[col].max() == 10.0 for col in columns)
@@ -0,0 +1,72 @@
+from itertools import product
+
+import numpy as np
+import pandas as pd
+import pytest
+
+from components.ga4.funnel import funnel_counts
+from components.ga4.hit_extract import HitExtract
+
+# Page ids per session: repeated pages, sessions shorter than the funnel and
+# an empty session
+SESSIONS = [
+    [0, 1, 2, 3],
+    [0, 0, 1, 1, 2],
+    [0, 4, 1, 4, 4, 2],
+    [1, 2, 0, 3],
+    [0, 1],
+    [2],
+    [],
+    [0, 4, 4, 4, 1, 2, 2, 3],
+    [3, 0, 1, 0, 1, 2, 3],
+    [1, 1, 1],
+]
+
+
+def make_extract(sessions):
+    lengths = [len(s) for s in sessions]
+    return HitExtract(
+        pages=np.array([f"/p{i}" for i in range(5)], dtype=object),
+        page_ids=np.array([p for s in sessions for p in s], dtype=np.int32),
+        offsets=np.concatenate([[0], np.cumsum(lengths)]).astype(np.int64),
+        sessions=pd.DataFrame({"bounces": np.zeros(len(sessions), dtype=np.int8)}),
+    )
+
+
+def reaches(session, steps, max_gap):
+    """Steps completed by one session, trying every ordered choice of hits."""
+    best = 0
+    for k in range(1, len(steps) + 1):
+        for positions in product(range(len(session)), repeat=k):
+            in_order = all(a < b for a, b in zip(positions, positions[1:]))
+            matches = all(session[p] in steps[i] for i, p in enumerate(positions))
+            gaps_ok = max_gap is None or all(
+                b - a - 1 <= max_gap for a, b in zip(positions, positions[1:])
+            )
+            if in_order and matches and gaps_ok:
+                best = k
+                break
+    return best
+
+
+def brute_force_counts(sessions, steps, max_gap):
+    reached = [reaches(s, steps, max_gap) for s in sessions]
+    return np.array([sum(r > k for r in reached) for k in range(len(steps))])
+
+
+@pytest.mark.parametrize("max_gap", [None, 0, 1, 2])
+@pytest.mark.parametrize(
+    "steps",
+    [
+        [[0], [1], [2], [3]],
+        [[0], [0], [1]],  # the same page at consecutive steps
+        [[1], [1], [1], [1]],  # longer than some sessions' repeats
+        [[0, 3], [1], [2, 4]],  # several pages accepted at a step
+    ],
+)
+def test_funnel_counts_match_brute_force(steps, max_gap):
+    extract = make_extract(SESSIONS)
+    step_ids = [np.array(ids) for ids in steps]
+
+    counts = funnel_counts(extract, step_ids, max_gap)
+    np.testing.assert_array_equal(counts, brute_force_counts(SESSIONS, steps, max_gap))
@@ -0,0 +1,37 @@
+from datetime import date
+from types import SimpleNamespace
+
+import pyarrow as pa
+
+from components.ga4 import hit_extract
+
+
+def test_days_without_sessions_are_fetched_again(monkeypatch, tmp_path):
+    monkeypatch.setenv("HIT_EXTRACT_DIR", str(tmp_path))
+    monkeypatch.setattr(
+        hit_extract, "get_query_backend", lambda: SimpleNamespace(name="fake")
+    )
+    queries = []
+
+    def run_query_arrow(sql, ttl=None):
+        queries.append(sql)
+        # Only the first day has sessions; the second shard is missing
+        return pa.table(
+            {
+                "date": pa.array([date(2017, 1, 1)], pa.date32()),
+                "bounces": pa.array([None], pa.int64()),
+                "pages": [["/home", "/cart"]],
+            }
+        )
+
+    monkeypatch.setattr(hit_extract, "run_query_arrow", run_query_arrow)
+
+    table = hit_extract._load_days(date(2017, 1, 1), date(2017, 1, 2))
+    assert table.num_rows == 1
+    assert [p.name for p in (tmp_path / "fake").iterdir()] == [
+        "ga_hits_20170101.parquet"
+    ]
+
+    hit_extract._load_days(date(2017, 1, 1), date(2017, 1, 2))
+    assert len(queries) == 2
+    assert "'20170102' AND '20170102'" in queries[1]
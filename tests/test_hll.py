@@ -0,0 +1,53 @@
+import duckdb
+import numpy as np
+import pytest
+
+from lib import hll
+from lib.query_backend import translate_to_duckdb
+
+
+def packed_sketch(first: int, last: int) -> np.ndarray:
+    """Packed registers of the ids in [first, last), built with the SQL helpers."""
+    sql = f"""
+    WITH hashed AS (
+      SELECT FARM_FINGERPRINT(CAST(id AS STRING)) AS h
+      FROM range({first}, {last}) AS ids(id)
+    ),
+    registers AS (
+      SELECT {hll.register_sql("h")} AS reg, MAX({hll.rho_sql("h")}) AS rho
+      FROM hashed
+      GROUP BY reg
+    )
+    SELECT {hll.pack_sql("reg", "rho")} AS packed FROM registers
+    """
+    return duckdb.sql(translate_to_duckdb(sql)).fetchnumpy()["packed"]
+
+
+def dense(packed: np.ndarray) -> np.ndarray:
+    return hll.merge(np.zeros(len(packed), dtype=np.int64), packed, 1)
+
+
+@pytest.mark.parametrize("n", [10, 10_000, 100_000])
+def test_estimate_is_within_a_few_percent(n):
+    estimate = hll.estimate(dense(packed_sketch(0, n)))[0]
+    assert estimate == pytest.approx(n, rel=0.05)
+
+
+def test_merged_sketches_equal_the_sketch_of_the_union():
+    a, b = packed_sketch(0, 6_000), packed_sketch(4_000, 10_000)
+    group_ids = np.zeros(len(a) + len(b), dtype=np.int64)
+    merged = hll.merge(group_ids, np.concatenate([a, b]), 1)
+
+    np.testing.assert_array_equal(merged, dense(packed_sketch(0, 10_000)))
+    assert hll.estimate(merged)[0] == pytest.approx(10_000, rel=0.05)
+
+
+def test_merge_keeps_groups_apart():
+    a, b = packed_sketch(0, 100), packed_sketch(100, 1_100)
+    group_ids = np.repeat([0, 1], [len(a), len(b)])
+    registers = hll.merge(group_ids, np.concatenate([a, b]), 2)
+
+    assert registers.shape == (2, hll.M)
+    estimates = hll.estimate(registers)
+    assert estimates[0] == pytest.approx(100, rel=0.05)
+    assert estimates[1] == pytest.approx(1_000, rel=0.05)
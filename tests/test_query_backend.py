@@ -0,0 +1,25 @@
+from datetime import date
+
+import pandas as pd
+import pyarrow as pa
+
+from lib.query_backend import arrow_to_pandas
+
+
+def test_arrow_to_pandas_keeps_bigquery_dtypes():
+    table = pa.table(
+        {
+            "day": pa.array([date(2024, 1, 1), None], pa.date32()),
+            "orders": pa.array([3, None], pa.int64()),
+            "returned": pa.array([True, None], pa.bool_()),
+            "revenue": pa.array([1.5, None], pa.float64()),
+        }
+    )
+    df = arrow_to_pandas(table)
+
+    assert pd.api.types.is_datetime64_dtype(df["day"])
+    assert df["day"].dt.year.tolist()[0] == 2024
+    assert df["orders"].dtype == pd.Int64Dtype()
+    assert df["orders"].isna().tolist() == [False, True]
+    assert df["returned"].dtype == pd.BooleanDtype()
+    assert df["revenue"].dtype == "float64"
@@ -0,0 +1,116 @@
+import threading
+from concurrent.futures import ThreadPoolExecutor
+from datetime import date, timedelta
+
+import pandas as pd
+import pyarrow as pa
+import pytest
+
+import lib.query_backend as query_backend
+from components.ec import daily_cube
+from lib.range_cache import DailyRangeCache
+from lib.result_cache import ResultCache
+
+
+class FakeBackend(query_backend.QueryBackend):
+    """Answers every query with one order-facts row per day in the range."""
+
+    name = "fake"
+
+    def __init__(self, first: date, last: date):
+        self.days = [first + timedelta(days=i) for i in range((last - first).days + 1)]
+        self.orders = 1
+        self.queries = 0
+
+    def query_arrow(self, sql: str) -> pa.Table:
+        self.queries += 1
+        n = len(self.days)
+        return pa.table(
+            {
+                "day": pa.array(self.days, pa.date32()),
+                "orders": [self.orders] * n,
+                "fulfilled_orders": [0] * n,
+                "proc_hours": pa.nulls(n, pa.float64()),
+                "ship_hours": pa.nulls(n, pa.float64()),
+            }
+        )
+
+    def table_metadata(self, table_id):
+        raise NotImplementedError
+
+    def preview_rows(self, table_id, max_rows):
+        raise NotImplementedError
+
+
+@pytest.fixture
+def clock(monkeypatch):
+    now = [1_000_000.0]
+    monkeypatch.setattr("time.time", lambda: now[0])
+    return now
+
+
+def test_volatile_day_is_refreshed_past_the_result_cache(monkeypatch, tmp_path, clock):
+    today = date.today()
+    backend = FakeBackend(today, today)
+    result_cache = ResultCache(str(tmp_path), max_bytes=1 << 20, default_ttl=3600)
+    monkeypatch.setattr(query_backend, "get_query_backend", lambda: backend)
+    monkeypatch.setattr(query_backend, "get_result_cache", lambda: result_cache)
+
+    cache = DailyRangeCache(daily_cube._fetch_order_facts, volatile_ttl=600)
+    assert cache.get(today, today)["orders"].tolist() == [1]
+
+    # New orders land in the warehouse; still within the refresh interval
+    backend.orders = 5
+    clock[0] += 300
+    assert cache.get(today, today)["orders"].tolist() == [1]
+
+    # Past volatile_ttl the day is re-queried instead of served from disk,
+    # even though the cube's own TTL (6 h) has not expired
+    clock[0] += 301
+    assert cache.get(today, today)["orders"].tolist() == [5]
+    assert backend.queries == 2
+
+
+def test_settled_days_keep_the_fetcher_ttl(monkeypatch, tmp_path, clock):
+    first = date.today() - timedelta(days=10)
+    backend = FakeBackend(first, first)
+    result_cache = ResultCache(str(tmp_path), max_bytes=1 << 20, default_ttl=3600)
+    monkeypatch.setattr(query_backend, "get_query_backend", lambda: backend)
+    monkeypatch.setattr(query_backend, "get_result_cache", lambda: result_cache)
+
+    calls = []
+
+    def fetch(start, end, **kwargs):
+        calls.append((start, end, kwargs))
+        return daily_cube._fetch_order_facts(start, end, **kwargs)
+
+    DailyRangeCache(fetch, volatile_days=2).get(first, date.today())
+    volatile_from = date.today() - timedelta(days=2)
+    assert calls == [
+        (first, volatile_from - timedelta(days=1), {}),
+        (volatile_from, date.today(), {"ttl": 600}),
+    ]
+
+
+def test_fetches_run_outside_the_lock_and_coalesce():
+    first = date.today() - timedelta(days=30)
+    release = threading.Event()
+    calls = []
+
+    def fetch(start, end, **kwargs):
+        calls.append((start, end))
+        if start == first:
+            assert release.wait(5)
+        days = pd.date_range(start, end)
+        return pd.DataFrame({"day": days, "orders": 1})
+
+    cache = DailyRangeCache(fetch)
+    with ThreadPoolExecutor(max_workers=3) as pool:
+        slow = [pool.submit(cache.get, first, first) for _ in range(2)]
+        # Another range is answered while the first fetch is still running
+        other = first + timedelta(days=5)
+        assert len(pool.submit(cache.get, other, other).result(timeout=5)) == 1
+        release.set()
+        assert [len(f.result(timeout=5)) for f in slow] == [1, 1]
+
+    assert calls.count((first, first)) == 1
@@ -0,0 +1,36 @@
+import numpy as np
+import pyarrow as pa
+
+from lib.result_cache import ResultCache
+
+
+def random_table(n_rows: int) -> pa.Table:
+    # Random doubles do not compress, so the file size tracks n_rows
+    return pa.table({"x": np.random.default_rng(n_rows).random(n_rows)})
+
+
+def test_oversized_result_is_skipped_without_evicting_others(tmp_path):
+    cache = ResultCache(str(tmp_path), max_bytes=64 * 1024, default_ttl=3600)
+    cache.put("small_a", random_table(100))
+    cache.put("small_b", random_table(200))
+
+    cache.put("huge", random_table(100_000))
+
+    assert cache.get("huge") is None
+    assert cache.get("small_a").num_rows == 100
+    assert cache.get("small_b").num_rows == 200
+    assert not list(tmp_path.glob("*.tmp"))
+
+
+def test_least_recently_used_entries_are_evicted(tmp_path):
+    cache = ResultCache(str(tmp_path), max_bytes=64 * 1024, default_ttl=3600)
+    for i in range(4):
+        cache.put(f"entry_{i}", random_table(3_000 + i))
+
+    # Each entry is ~24 KB, so only the two most recent fit the budget
+    assert [cache.get(f"entry_{i}") is not None for i in range(4)] == [
+        False,
+        False,
+        True,
+        True,
+    ]
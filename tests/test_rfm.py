@@ -0,0 +1,76 @@
+import numpy as np
+import pandas as pd
+import pytest
+
+from components.ec.rfm import bucket_scores, cut_points, score_rfm
+
+
+def rfm_frame(n=600):
+    rng = np.random.default_rng(0)
+    # Small integer metrics, so many customers sit exactly on a cut point
+    return pd.DataFrame(
+        {
+            "user_id": np.arange(n),
+            "recency": rng.integers(0, 10, n),
+            "frequency": rng.integers(1, 5, n),
+            "monetary": rng.choice([10.0, 20.0, 35.5, 50.0, 99.9], n),
+        }
+    )
+
+
+def apply_scores(rfm: pd.DataFrame) -> pd.DataFrame:
+    """The per-row scoring the page used before, with cut points at exact thirds."""
+    q1 = rfm.quantile(1 / 3)
+    q2 = rfm.quantile(2 / 3)
+
+    def r_score(x):
+        return 3 if x <= q1.recency else 2 if x <= q2.recency else 1
+
+    def fm_score(x, col):
+        return 1 if x <= q1[col] else 2 if x <= q2[col] else 3
+
+    return pd.DataFrame(
+        {
+            "R": rfm["recency"].apply(r_score),
+            "F": rfm["frequency"].apply(lambda x: fm_score(x, "frequency")),
+            "M": rfm["monetary"].apply(lambda x: fm_score(x, "monetary")),
+        }
+    )
+
+
+def test_score_rfm_matches_the_apply_based_scoring():
+    rfm = rfm_frame()
+    scored = score_rfm(rfm, n_buckets=3)
+    expected = apply_scores(rfm)
+
+    for col in ("R", "F", "M"):
+        np.testing.assert_array_equal(scored[col], expected[col])
+    segments = (
+        expected["R"].astype(str)
+        + expected["F"].astype(str)
+        + expected["M"].astype(str)
+    )
+    assert scored["Segment"].astype(str).tolist() == segments.tolist()
+
+
+def test_values_on_a_cut_fall_in_the_lower_bucket():
+    cuts = np.array([2.0, 5.0])
+    values = np.array([1.0, 2.0, 3.0, 5.0, 6.0])
+
+    np.testing.assert_array_equal(bucket_scores(values, cuts), [1, 1, 2, 2, 3])
+    # Recency is reversed: the most recent customers score highest
+    np.testing.assert_array_equal(
+        bucket_scores(values, cuts, reverse=True), [3, 3, 2, 2, 1]
+    )
+
+
+@pytest.mark.parametrize("n_buckets", [2, 4, 5])
+def test_bucket_scores_count_the_cuts_below_each_value(n_buckets):
+    values = rfm_frame()["monetary"].to_numpy()
+    cuts = cut_points(values, n_buckets)
+    below = (cuts[None, :] < values[:, None]).sum(axis=1)
+
+    np.testing.assert_array_equal(bucket_scores(values, cuts), below + 1)
+    np.testing.assert_array_equal(
+        bucket_scores(values, cuts, reverse=True), n_buckets - below
+    )